@@ -0,0 +1,140 @@
+#
+#  Frame pipeline benchmark
+#
+#  Renders the real main.py frame pipeline headlessly, for every combination of the given settings.
+#  Each case runs warm-up frames, then timed frames, and prints one JSON object per line to stdout,
+#  so results can be collected and compared across machines and releases.
+#
+#  Example:
+#      python benchmark.py --steps 400 4000 --dots 40 4000 --rows 1 0 --circum 0 1 > results.jsonl
+#      python benchmark.py --matrix-rows 2 8 32 > results.jsonl
+#      python benchmark.py --trail 0 100 5000 > results.jsonl
+#
+
+import argparse
+import contextlib
+import itertools
+import json
+import sys
+from time import perf_counter_ns
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+# My files
+import matrix_demo_graphics as mg
+import matrix_demo_engine as me
+import matrix_demo_timing as mt
+
+# Fixed, non-trivial matrix, so every case draws the same thing
+BENCHMARK_MATRIX = [[1.0, 0.5], [0.3, 1.2]]
+
+
+# Fixed matrix with any number of rows. Rows of different lengths, fanned around half a circle
+def benchmark_matrix(matrix_rows):
+    if matrix_rows == 2:
+        return BENCHMARK_MATRIX
+    return me.initial_matrix(matrix_rows) * np.linspace(0.5, 1.5, matrix_rows)[:, None]
+
+
+# Run one case, and return its results
+def run_case(steps, dots, size, dpi, matrix_rows, rows, shadow, circum, trail, speed, warmup, frames):
+    mg.settings = mg.Settings()
+    mg.settings.matrixRows = matrix_rows
+    mg.settings.matrixRowsToShow = rows or matrix_rows
+    mg.settings.flagShadow = shadow
+    mg.settings.flagCircum = circum
+    mg.settings.animation_speed = speed
+    if trail:
+        mg.settings.flagTrail = True
+        mg.settings.trailLength = trail
+
+    # Engine reports its setup on stdout, which is reserved for results
+    with contextlib.redirect_stdout(sys.stderr):
+        gObjects = mg.HeadlessGraphicsObjects(size, dpi)
+        engine = me.AnimationEngine(gObjects.canvas1, gObjects.textObj, steps, dots)
+    engine.set_matrix(benchmark_matrix(matrix_rows))
+    gObjects.canvas1.draw()
+
+    for i in range(0, warmup):
+        engine.draw_frame()
+        engine.advance()
+
+    # Only count timed frames
+    engine.timer = mt.StageTimer()
+    engine.compositor.reset_statistics()
+    frameTimes = mt.Histogram()
+
+    start = perf_counter_ns()
+    for i in range(0, frames):
+        t = perf_counter_ns()
+        engine.draw_frame()
+        engine.advance()
+        frameTimes.add(perf_counter_ns() - t)
+    elapsed = perf_counter_ns() - start
+
+    plt.close(gObjects.fig1)
+
+    result = {
+        'params': {'steps': steps, 'dots': dots, 'size': size, 'dpi': dpi, 'matrix_rows': matrix_rows, 'rows': rows,
+                   'shadow': shadow, 'circum': circum, 'trail': trail,
+                   'speed': speed, 'warmup': warmup, 'frames': frames},
+        'metadata': mt.run_metadata(engine, 'benchmark'),
+        'fps': frames / (elapsed / 1e9),
+        'frame_ms': {'mean': frameTimes.mean() / 1e6,
+                     'p50': frameTimes.percentile(50) / 1e6,
+                     'p95': frameTimes.percentile(95) / 1e6,
+                     'p99': frameTimes.percentile(99) / 1e6,
+                     'max': frameTimes.max / 1e6},
+        'pixels_per_frame': engine.compositor.pixelsTotal / frames,
+        'stages': {}
+    }
+    for stage, s in engine.timer.to_dict()['stages'].items():
+        if s['count']:
+            result['stages'][stage] = {k: s[k] for k in ['mean_ns', 'p50_ns', 'p95_ns', 'p99_ns']}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the matrix demo frame pipeline. '
+                                                 'Every combination of the listed values is one case.')
+    parser.add_argument('--steps', type=int, nargs='+', default=[400], help='animation steps per orbit')
+    parser.add_argument('--dots', type=int, nargs='+', default=[40], help='circumference dots per orbit')
+    parser.add_argument('--size', type=int, nargs='+', default=[1000], help='figure size in pixels')
+    parser.add_argument('--dpi', type=int, nargs='+', default=[100], help='figure DPI')
+    parser.add_argument('--matrix-rows', type=int, nargs='+', default=[2], help='rows in matrix, 2 or more')
+    parser.add_argument('--rows', type=int, nargs='+', default=[0], help='matrix rows to show, 0 for all')
+    parser.add_argument('--shadow', type=int, nargs='+', choices=[0, 1], default=[1], help='show shadow lines')
+    parser.add_argument('--circum', type=int, nargs='+', choices=[0, 1], default=[1], help='show circumference dots')
+    parser.add_argument('--trail', type=int, nargs='+', default=[0], help='output vector trail length, 0 for none')
+    parser.add_argument('--speed', type=int, default=50, help='animation speed, 1 to 100')
+    parser.add_argument('--warmup', type=int, default=50, help='untimed frames before each case')
+    parser.add_argument('--frames', type=int, default=500, help='timed frames per case')
+    args = parser.parse_args()
+
+    if min(args.steps) < 1 or min(args.dots) < 1:
+        parser.error('--steps and --dots must be at least 1')
+    if args.speed <= 0:
+        parser.error('--speed must be positive, or animation never moves')
+    if min(args.matrix_rows) < 2:
+        parser.error('--matrix-rows must be at least 2')
+
+    if min(args.trail) < 0:
+        parser.error('--trail must not be negative')
+
+    for steps, dots, size, dpi, matrix_rows, rows, shadow, circum, trail in itertools.product(
+            args.steps, args.dots, args.size, args.dpi, args.matrix_rows, args.rows, args.shadow, args.circum,
+            args.trail):
+        if not 0 <= rows <= matrix_rows:
+            continue  # Can't show more rows than matrix has
+        result = run_case(steps, dots, size, dpi, matrix_rows, rows, bool(shadow), bool(circum), trail, args.speed,
+                          args.warmup, args.frames)
+        print(json.dumps(result), flush=True)
+        print('steps {:d} dots {:d} size {:d} dpi {:d} matrix rows {:d} rows {:d} shadow {:d} circum {:d} trail {:d}: '
+              '{:.1f} frames/sec'.format(steps, dots, size, dpi, matrix_rows, rows, shadow, circum, trail,
+                                         result['fps']),
+              file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+#
+#  Orbit export
+#
+#  Renders orbits for a given matrix to a PNG sequence, or to a video through a local ffmpeg. Frames are split
+#  across a pool of processes. Each worker builds its own offscreen figure and engine, exactly as headless
+#  mode does, and renders the frames it is given by seeking straight to them.
+#
+#  Examples:
+#      python export.py --matrix 1 0.5 0.3 1.2 --circum --output frames
+#      python export.py --matrix 1 0 0.7 0.7 -0.7 0.7 --orbits 2 --output orbit.mp4
+#
+
+import argparse
+import collections
+import contextlib
+import itertools
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib as mpl
+import matplotlib.image as mimage
+import numpy as np
+
+# My files
+import matrix_demo_graphics as mg
+import matrix_demo_engine as me
+
+# Output names with these extensions are encoded as video. Anything else is a directory of PNG files.
+VIDEO_EXTENSIONS = ['.mp4', '.mkv', '.mov', '.webm']
+
+# PNG is lossless at any level. Fastest compression more than halves time per frame, for somewhat bigger files
+PNG_COMPRESS_LEVEL = 1
+
+# Frames per task. Big enough to keep workers busy, small enough to spread frames evenly over them
+CHUNK_FRAMES = 16
+
+# Chunks in flight per worker. Finished video chunks wait in memory until the encoder takes them, so this
+# bounds memory however long the export, while still keeping every worker busy
+CHUNKS_PER_WORKER = 2
+
+# Engine owned by this worker process, created by init_worker()
+worker = None
+
+
+# Build figure and engine in a worker process
+def init_worker(options):
+    global worker
+
+    mpl.use('Agg')
+    mg.settings = mg.Settings()
+    mg.settings.matrixRows = len(options['matrix'])
+    mg.settings.matrixRowsToShow = options['rows'] or mg.settings.matrixRows
+    mg.settings.flagCircum = options['circum']
+    mg.settings.flagShadow = options['shadow']
+
+    # Engine reports its setup on stdout, which would repeat once per worker
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        gObjects = mg.HeadlessGraphicsObjects(options['size'], options['dpi'])
+        worker = me.AnimationEngine(gObjects.canvas1, gObjects.textObj, options['steps'], options['dots'])
+    worker.set_matrix(options['matrix'])
+    gObjects.canvas1.draw()
+    worker.options = options
+
+
+# Render frames first..last-1. PNG frames are written here, and video frames are returned as raw RGBA bytes
+def render_frames(first, last):
+    options = worker.options
+    frames = []
+    for f in range(first, last):
+        worker.seek(f * options['steps_per_frame'])
+        worker.draw_frame()
+        rgba = np.asarray(worker.canvas.buffer_rgba())
+        if options['video']:
+            frames.append(rgba.tobytes())
+        else:
+            mimage.imsave(os.path.join(options['output'], 'frame_{:06d}.png'.format(f)), rgba,
+                           pil_kwargs={'compress_level': PNG_COMPRESS_LEVEL})
+    return frames
+
+
+# Start ffmpeg reading raw RGBA frames on stdin
+def start_encoder(output, size, fps):
+    command = [mpl.rcParams['animation.ffmpeg_path'], '-y', '-loglevel', 'error',
+               '-f', 'rawvideo', '-pix_fmt', 'rgba', '-s', '{:d}x{:d}'.format(size, size), '-r', str(fps), '-i', '-',
+               '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-pix_fmt', 'yuv420p', output]
+    try:
+        return subprocess.Popen(command, stdin=subprocess.PIPE)
+    except FileNotFoundError:
+        sys.exit('Video export needs ffmpeg. Install it, or set animation.ffmpeg_path in matplotlibrc')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export matrix demo orbits to a PNG sequence or video')
+    parser.add_argument('--matrix', type=float, nargs='+', default=[1.0, 0.0, 0.0, 1.0],
+                        help='matrix values, row by row, 2 per row')
+    parser.add_argument('--steps', type=int, default=400, help='animation steps per orbit')
+    parser.add_argument('--dots', type=int, default=40, help='circumference dots per orbit')
+    parser.add_argument('--orbits', type=int, default=1, help='orbits to export')
+    parser.add_argument('--speed', type=int, default=25, help='animation speed, 1 to 100. 25 is one step per frame')
+    parser.add_argument('--rows', type=int, default=0, help='matrix rows to show, 0 for all')
+    parser.add_argument('--circum', action='store_true', help='show circumference dots')
+    parser.add_argument('--no-shadow', dest='shadow', action='store_false', help='hide shadow projections')
+    parser.add_argument('--size', type=int, default=1000, help='frame size in pixels')
+    parser.add_argument('--dpi', type=int, default=100, help='figure DPI')
+    parser.add_argument('--fps', type=int, default=60, help='video frame rate')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='worker processes')
+    parser.add_argument('--output', required=True,
+                        help='directory for PNG frames, or video file ({:s})'.format(', '.join(VIDEO_EXTENSIONS)))
+    args = parser.parse_args()
+
+    if len(args.matrix) < 4 or len(args.matrix) % 2:
+        parser.error('--matrix needs 2 values per row, and at least 2 rows')
+    if args.steps < 1 or args.dots < 1:
+        parser.error('--steps and --dots must be at least 1')
+    if args.speed <= 0:
+        parser.error('--speed must be positive, or animation never moves')
+    if args.jobs < 1:
+        parser.error('--jobs must be at least 1')
+
+    matrix = np.array(args.matrix).reshape(-1, 2)
+    if not 0 <= args.rows <= len(matrix):
+        parser.error('--rows must be between 0 and number of matrix rows')
+
+    video = os.path.splitext(args.output)[1].lower() in VIDEO_EXTENSIONS
+    if not video:
+        os.makedirs(args.output, exist_ok=True)
+
+    # Same rounding of steps as engine, so frames cover whole orbits
+    stepsPerOrbit = max(round(args.steps / args.dots), 1) * args.dots
+    stepsPerFrame = args.speed / 25
+    total = int(np.ceil(args.orbits * stepsPerOrbit / stepsPerFrame))
+
+    options = {'matrix': matrix.tolist(), 'steps': args.steps, 'dots': args.dots, 'rows': args.rows,
+               'circum': args.circum, 'shadow': args.shadow, 'size': args.size, 'dpi': args.dpi,
+               'steps_per_frame': stepsPerFrame, 'video': video, 'output': args.output}
+
+    encoder = start_encoder(args.output, args.size, args.fps) if video else None
+
+    # Spawn rather than fork, so workers don't inherit the parent's matplotlib state
+    start = time.perf_counter()
+    chunks = [(f, min(f + CHUNK_FRAMES, total)) for f in range(0, total, CHUNK_FRAMES)]
+    with ProcessPoolExecutor(args.jobs, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=init_worker, initargs=(options,)) as pool:
+        # Results are taken in order of chunks, whichever worker finishes first. Only a few chunks are submitted
+        # ahead, and another goes in as each is taken
+        remaining = iter(chunks)
+        pending = collections.deque(pool.submit(render_frames, *chunk)
+                                    for chunk in itertools.islice(remaining, CHUNKS_PER_WORKER * args.jobs))
+        done = 0
+        while pending:
+            frames = pending.popleft().result()
+            chunk = next(remaining, None)
+            if chunk:
+                pending.append(pool.submit(render_frames, *chunk))
+            if encoder:
+                for frame in frames:
+                    encoder.stdin.write(frame)
+            done = done + CHUNK_FRAMES
+            print('\rFrames {:d} of {:d}'.format(min(done, total), total), end='', file=sys.stderr)
+    print(file=sys.stderr)
+
+    if encoder:
+        encoder.stdin.close()
+        if encoder.wait():
+            sys.exit('ffmpeg failed')
+
+    elapsed = time.perf_counter() - start
+    print('Exported {:d} frames in {:.2f} s ({:.1f} frames/sec, {:d} workers)'.format(
+        total, elapsed, total / elapsed, args.jobs))
+
+
+if __name__ == '__main__':
+    main()
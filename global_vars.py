@@ -1,5 +0,0 @@
-
-
-global ax1, ax2
-
-global axBar, bgBar, bg1, bg2, barlist
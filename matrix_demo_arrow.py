@@ -0,0 +1,97 @@
+#
+#  Lightweight arrow
+#
+#  Looks like a FancyArrowPatch with the "simple" arrow style, but far cheaper to move. FancyArrowPatch builds
+#  a new path every draw, from Bezier curves split at the head. For a straight arrow that path is just a
+#  polygon: a rectangular tail and a triangular head. Here the polygon is kept, in points, with its tip at
+#  the origin and its tail along negative x. Moving the arrow only sets the tail's two x coordinates and a
+#  transform that rotates, scales and moves the polygon onto the screen. Head corners are only recomputed
+#  when head length changes.
+#
+
+import numpy as np
+import matplotlib.patches as mpatches
+from matplotlib.path import Path
+from matplotlib.transforms import Affine2D
+
+# Sizes, as fractions of mutation scale. Same as the "simple" arrow style's defaults
+HEAD_LENGTH = 0.5
+HEAD_WIDTH = 0.5
+TAIL_WIDTH = 0.2
+
+# Both ends stop this many points short of their positions, like FancyArrowPatch's default shrinkA and shrinkB
+SHRINK = 2
+
+# Polygon outline: tail right, head base right, head right, tip, head left, head base left, tail left
+CODES = [Path.MOVETO] + [Path.LINETO] * 6 + [Path.CLOSEPOLY]
+
+
+class Arrow(mpatches.Patch):
+
+    # Arrow from posA to posB, in data coordinates. Mutation scale is the arrow's thickness in points
+    def __init__(self, posA, posB, mutation_scale=10, head_length=HEAD_LENGTH, **kwargs):
+        self.colorSet = None  # Last color given to set_color(). Patch's constructor sets the first
+        super().__init__(**kwargs)
+        self.posA = posA
+        self.posB = posB
+        self.mutationScale = mutation_scale
+        self.headLength = None
+        self.path = Path(np.zeros((len(CODES), 2)), CODES)
+        self.placement = Affine2D()  # Points relative to tip, to display coordinates. Set when drawn
+        self.set_head_length(head_length)
+
+    def set_positions(self, posA, posB):
+        self.posA = posA
+        self.posB = posB
+        self.stale = True
+
+    # Head length as a fraction of mutation scale. Rebuilds head corners, but only if it actually changed
+    def set_head_length(self, head_length):
+        if head_length == self.headLength:
+            return
+        self.headLength = head_length
+
+        scale = self.mutationScale
+        h = head_length * scale
+        hw = HEAD_WIDTH * scale / 2
+        tw = TAIL_WIDTH * scale / 2
+        self.path.vertices[:, 1] = [-tw, -tw, -hw, 0, hw, tw, tw, -tw]
+        self.path.vertices[1:6, 0] = [-h, -h, 0, -h, -h]
+        self.stale = True
+
+    # Colors rarely change, and callers pass the same color constant every frame. Skip converting it again
+    def set_color(self, c):
+        if c is self.colorSet:
+            return
+        self.colorSet = c
+        super().set_color(c)
+
+    def get_path(self):
+        return self.path
+
+    def get_transform(self):
+        return self.placement
+
+    # Place polygon between the two positions as they are on screen now, then draw it like any patch
+    def draw(self, renderer):
+        if not self.get_visible():
+            return
+        pointsToPixels = renderer.points_to_pixels(1.)
+        start, tip = self.get_data_transform().transform([self.posA, self.posB])
+        dx, dy = tip - start
+        length = np.hypot(dx, dy)
+        if length == 0:
+            return  # No direction to point in. FancyArrowPatch draws nothing either
+
+        shrink = SHRINK * pointsToPixels
+        if length > 2 * shrink:
+            tip = tip - (dx, dy) / length * shrink
+            length = length - 2 * shrink
+
+        # Arrows shorter than their head are all head
+        tail = -max(length / pointsToPixels, self.headLength * self.mutationScale)
+        vertices = self.path.vertices
+        vertices[0, 0] = vertices[6, 0] = vertices[7, 0] = tail
+
+        self.placement.clear().scale(pointsToPixels).rotate(np.arctan2(dy, dx)).translate(tip[0], tip[1])
+        super().draw(renderer)
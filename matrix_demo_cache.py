@@ -0,0 +1,77 @@
+#
+#  Orbit cache
+#
+#  Everything about an orbit that depends only on the matrix: per-step output vectors and projection segments,
+#  output dot positions, and matrix text. Kept for recently seen matrices, so that going back to one (e.g.
+#  toggling keep orthogonal, or dragging between favourite matrices) costs a lookup rather than a recompute.
+#  Least recently used matrices are dropped once the cache outgrows its memory budget.
+#
+#  Matrices match if they agree after rounding to QUANTUM, far below a pixel and below the 3 decimals shown.
+#
+
+from collections import OrderedDict
+
+import numpy as np
+
+QUANTUM = 1e-4
+
+
+class OrbitEntry:
+    def __init__(self, matrix, orbit, texts):
+        self.matrix = matrix.copy()  # Matrix orbit was computed for
+        self.orbit = orbit  # Arrays from UnitCircleStuff.orbitArrays(). Never changed in place
+        self.texts = texts  # Formatted matrix rows
+        self.nbytes = self.matrix.nbytes + sum([a.nbytes for a in orbit.values()]) + sum([len(t) for t in texts])
+
+
+class OrbitCache:
+
+    def __init__(self, budgetBytes, stepsPerOrbit, dotsPerOrbit):
+        self.budgetBytes = budgetBytes
+        self.stepsPerOrbit = stepsPerOrbit
+        self.dotsPerOrbit = dotsPerOrbit
+        self.entries = OrderedDict()  # Least recently used first
+        self.nbytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, matrix):
+        quantized = np.round(matrix / QUANTUM).astype(np.int64)
+        return self.stepsPerOrbit, self.dotsPerOrbit, matrix.shape, quantized.tobytes()
+
+    # Entry for matrix, or None if it isn't cached
+    def lookup(self, matrix):
+        key = self.key(matrix)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses = self.misses + 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits = self.hits + 1
+        return entry
+
+    # Add orbit for matrix, dropping least recently used entries to stay within budget
+    def store(self, matrix, orbit, texts):
+        entry = OrbitEntry(matrix, orbit, texts)
+        if entry.nbytes > self.budgetBytes:
+            return  # Wouldn't fit even on its own. Includes a budget of 0, which turns caching off
+
+        key = self.key(matrix)
+        if key in self.entries:
+            self.nbytes = self.nbytes - self.entries.pop(key).nbytes
+        self.entries[key] = entry
+        self.nbytes = self.nbytes + entry.nbytes
+
+        while self.nbytes > self.budgetBytes:
+            _, oldest = self.entries.popitem(last=False)
+            self.nbytes = self.nbytes - oldest.nbytes
+            self.evictions = self.evictions + 1
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 'No orbit cache lookups'
+        return 'Orbit cache hits {:d} of {:d} ({:.1f}%), {:d} matrices in {:.1f} MB, {:d} evicted'.format(
+            self.hits, lookups, 100 * self.hits / lookups, len(self.entries), self.nbytes / 1e6, self.evictions)
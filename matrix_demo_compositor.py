@@ -0,0 +1,113 @@
+#
+#  Dirty-region compositor
+#
+#  Each panel (text, bar chart, input plot, output plot) has a saved background bitmap. Every frame, the
+#  engine hands each panel a key that captures everything its artists depend on. Only panels whose
+#  key changed get their background restored and artists redrawn. Dirty regions are then merged into
+#  fewer canvas.blit() calls, as long as that doesn't push many extra pixels.
+#
+
+from matplotlib.transforms import Bbox
+
+# Merge dirty regions if their union is no more than this much bigger than the panels inside it. Panels
+# are laid out in a 2x2 grid with small gaps, so neighbours in a row or column merge, but the extra
+# pixels pushed stay small.
+MERGE_SLACK = 1.15
+
+
+# Number of pixels in a bbox
+def bbox_pixels(bbox):
+    return int(round(bbox.width)) * int(round(bbox.height))
+
+
+# Merge nearby bboxes into fewer, larger ones, as long as the union doesn't waste too many pixels
+def merge_bboxes(bboxes):
+    # Each region is [bbox, pixels of the original bboxes inside it]
+    regions = [[b, bbox_pixels(b)] for b in bboxes]
+    found = True
+    while found:
+        found = False
+        for i in range(0, len(regions)):
+            for j in range(i + 1, len(regions)):
+                union = Bbox.union([regions[i][0], regions[j][0]])
+                needed = regions[i][1] + regions[j][1]
+                if bbox_pixels(union) <= MERGE_SLACK * needed:
+                    regions[i] = [union, needed]
+                    del regions[j]
+                    found = True
+                    break
+            if found:
+                break
+    return [r[0] for r in regions]
+
+
+class Panel:
+    def __init__(self, bbox, get_background):
+        self.bbox = bbox  # Live bbox of the axes, in display pixels
+        self.get_background = get_background  # Returns saved background bitmap, so it can be recaptured later
+        self.key = None  # Key of the last frame drawn
+
+
+class Compositor:
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.panels = {}
+        self.dirty = []
+
+        self.reset_statistics()
+
+    def reset_statistics(self):
+        self.frames = 0
+        self.pixelsLastFrame = 0
+        self.regionsLastFrame = []  # Bboxes blitted last frame, e.g. for streaming them elsewhere
+        self.pixelsTotal = 0
+        self.blitsTotal = 0
+
+    def add_panel(self, name, bbox, get_background):
+        self.panels[name] = Panel(bbox, get_background)
+
+    # Force every panel to redraw next frame, e.g. after a full canvas.draw()
+    def invalidate(self):
+        for panel in self.panels.values():
+            panel.key = None
+
+    # Returns True if panel needs redrawing, in which case its background has been restored and caller
+    # should draw its artists. Key can be anything comparable, e.g. a tuple of the values the panel shows.
+    def begin_panel(self, name, key):
+        panel = self.panels[name]
+        if key == panel.key:
+            return False
+
+        panel.key = key
+        self.canvas.restore_region(panel.get_background())  # Restores static elements and erases background
+        self.dirty.append(panel.bbox)
+        return True
+
+    # Render dirty panels to screen
+    def blit(self):
+        regions = merge_bboxes(self.dirty)
+        self.dirty = []
+
+        pixels = 0
+        for bbox in regions:
+            self.canvas.blit(bbox)
+            pixels = pixels + bbox_pixels(bbox)
+
+        self.frames = self.frames + 1
+        self.pixelsLastFrame = pixels
+        self.regionsLastFrame = regions
+        self.pixelsTotal = self.pixelsTotal + pixels
+        self.blitsTotal = self.blitsTotal + len(regions)
+
+    # Pixels that blitting every panel separately would push, i.e. without the compositor
+    def all_panel_pixels(self):
+        return sum([bbox_pixels(p.bbox) for p in self.panels.values()])
+
+    def summary(self):
+        if self.frames == 0:
+            return 'No frames drawn'
+        average = self.pixelsTotal / self.frames
+        full = self.all_panel_pixels()
+        return 'Pixels pushed per frame {:.0f} of {:d} ({:.1f}%), blits per frame {:.2f}'.format(
+            average, full, 100 * average / full, self.blitsTotal / self.frames)
@@ -0,0 +1,226 @@
+#
+#  Command channel
+#
+#  Lets scripts drive the demo through a local UNIX socket or stdin, rather than the mouse. Each line holds one
+#  or more commands separated by ";". Reader threads parse and check lines, then queue them. The frame loop
+#  applies everything queued once per frame, on its own thread, so commands never race drawing, and a flood of
+#  matrix updates costs one orbit recompute per frame. Socket clients get "ok" or "error ..." back per line.
+#
+#  Commands:
+#      matrix A B C D ...                          whole matrix, row by row
+#      row I X Y                                   one matrix row, counting from 0
+#      rows N                                      show first N rows, or "all"
+#      shadow|circum|ortho|animate|trail|strip|warp on|off|toggle
+#      speed N                                     animation speed, 0 to 100
+#      step N                                      jump to step N of animation
+#      quit
+#
+#  Example:
+#      python main.py --control /tmp/matrix.sock
+#      echo "rows all; circum on; matrix 1 0.5 0.3 1.2" | nc -U /tmp/matrix.sock
+#
+
+import math
+import os
+import queue
+import socket
+import socketserver
+import stat
+import sys
+import threading
+
+import numpy as np
+
+# My files
+import matrix_demo_graphics as mg
+
+# Settings flipped by on/off/toggle commands. Recalc tells the GUI to update its buttons
+SWITCHES = {'shadow': 'flagShadow', 'circum': 'flagCircum', 'animate': 'flagAnimate', 'trail': 'flagTrail',
+            'strip': 'flagStrip', 'warp': 'flagWarp'}
+
+
+# Convert words to numbers, or raise ValueError naming the command
+def numbers(name, words, count=None):
+    if count is not None and len(words) != count:
+        raise ValueError('{:s} needs {:d} values'.format(name, count))
+    try:
+        values = [float(w) for w in words]
+    except ValueError:
+        raise ValueError('{:s} needs numbers'.format(name))
+    if not all(math.isfinite(v) for v in values):
+        raise ValueError('{:s} needs finite numbers'.format(name))
+    return values
+
+
+# Check one command, and return it as (name, arguments)
+def parse_command(words):
+    name, words = words[0].lower(), words[1:]
+    rows = mg.settings.matrixRows
+
+    if name == 'matrix':
+        return name, numbers(name, words, 2 * rows)
+    if name == 'row':
+        r, x, y = numbers(name, words, 3)
+        if not r.is_integer() or not 0 <= r < rows:
+            raise ValueError('row must be between 0 and {:d}'.format(rows - 1))
+        return name, [int(r), x, y]
+    if name == 'rows':
+        if words == ['all']:
+            return name, [rows]
+        n, = numbers(name, words, 1)
+        if not n.is_integer() or not 1 <= n <= rows:
+            raise ValueError('rows must be between 1 and {:d}, or all'.format(rows))
+        return name, [int(n)]
+    if name in SWITCHES or name == 'ortho':
+        if len(words) != 1 or words[0] not in ['on', 'off', 'toggle']:
+            raise ValueError('{:s} needs on, off or toggle'.format(name))
+        return name, words
+    if name == 'speed':
+        speed, = numbers(name, words, 1)
+        if not 0 <= speed <= 100:
+            raise ValueError('speed must be between 0 and 100')
+        return name, [int(speed)]
+    if name == 'step':
+        step, = numbers(name, words, 1)
+        if step < 0:
+            raise ValueError('step must not be negative')
+        return name, [step]
+    if name == 'quit' and not words:
+        return name, []
+    raise ValueError('unknown command {:s}'.format(' '.join([name] + words)))
+
+
+# Check a line of commands. Raises ValueError, and queues nothing, if any command is bad
+def parse_line(line):
+    return [parse_command(c.split()) for c in line.split(';') if c.strip()]
+
+
+def switch(value, word):
+    return not value if word == 'toggle' else word == 'on'
+
+
+class CommandQueue:
+
+    def __init__(self):
+        self.queue = queue.SimpleQueue()  # (line, commands). Safe to put from any thread
+        self.server = None
+        self.recorder = None  # matrix_demo_replay.Recorder, or None. Logs lines as they are applied
+
+    # Check a line of commands and queue it. Called from reader threads
+    def put_line(self, line):
+        commands = parse_line(line)
+        if commands:
+            self.queue.put((line.strip(), commands))
+
+    def pending(self):
+        return not self.queue.empty()
+
+    # Apply everything queued, in order. Matrix changes are collected, so orbit is recomputed once at the end.
+    # Call from the thread that draws frames. Returns number of lines applied.
+    def apply(self, engine):
+        settings = mg.settings
+        matrixChanged = False
+        lines = 0
+
+        while True:
+            try:
+                line, commands = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            lines = lines + 1
+            if self.recorder:
+                self.recorder.command(line)
+
+            for name, args in commands:
+                if name == 'matrix':
+                    engine.Array1[:, :] = np.reshape(args, (-1, 2))
+                    matrixChanged = True
+                elif name == 'row':
+                    r, x, y = args
+                    engine.Array1[r, :] = x, y
+                    if settings.keep_ortho and r < 2:
+                        # Like dragging with the mouse, other of first two rows stays 90 degrees counterclockwise
+                        engine.Array1[1 - r, :] = -y, x
+                    matrixChanged = True
+                elif name == 'rows':
+                    settings.matrixRowsToShow = args[0]
+                    settings.flagRecalc = True
+                elif name in SWITCHES:
+                    attribute = SWITCHES[name]
+                    setattr(settings, attribute, switch(getattr(settings, attribute), args[0]))
+                    settings.flagRecalc = True
+                elif name == 'ortho':
+                    # Same as the checkbox. Turning it on makes row 1 orthogonal to row 0 straight away
+                    settings.keep_ortho = int(switch(settings.keep_ortho, args[0]))
+                    settings.flagChangeMatrix = settings.keep_ortho
+                    settings.whichRowToAdjust = -1
+                    settings.flagRecalc = True
+                elif name == 'speed':
+                    settings.animation_speed = args[0]
+                elif name == 'step':
+                    engine.seek(args[0])
+                elif name == 'quit':
+                    settings.quitflag = True
+
+        if matrixChanged:
+            engine.matrix_changed()
+        if lines:
+            settings.changed()
+        return lines
+
+    # Read commands from stdin, in a background thread. Bad lines are reported on stderr
+    def read_stdin(self):
+        def read():
+            for line in sys.stdin:
+                try:
+                    self.put_line(line)
+                except ValueError as e:
+                    print('error', e, file=sys.stderr)
+
+        threading.Thread(target=read, daemon=True).start()
+
+    # Accept commands on a UNIX socket, in background threads. Any number of clients may connect at once
+    def serve_socket(self, path):
+        if os.path.exists(path):
+            # Socket left behind by an earlier run. Anything else there is probably a mistyped path, so leave it
+            if not stat.S_ISSOCK(os.stat(path).st_mode):
+                raise ValueError('{:s} exists and is not a socket'.format(path))
+            os.unlink(path)
+        self.server = socketserver.ThreadingUnixStreamServer(path, CommandHandler)
+        self.server.daemon_threads = True
+        self.server.commands = self
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            os.unlink(self.server.server_address)
+
+
+# Socket clients send lines of commands, and get a reply to each
+class CommandHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                self.server.commands.put_line(line.decode('utf-8', 'replace'))
+                reply = 'ok\n'
+            except ValueError as e:
+                reply = 'error {:s}\n'.format(str(e))
+            try:
+                self.wfile.write(reply.encode())
+            except OSError:
+                return  # Client stopped listening, e.g. a script that only sends
+
+
+# Open command channel: "stdin", or path of a UNIX socket
+def open_channel(where):
+    commands = CommandQueue()
+    if where == '-' or where == 'stdin':
+        commands.read_stdin()
+    elif hasattr(socket, 'AF_UNIX'):
+        commands.serve_socket(where)
+    else:
+        raise ValueError('UNIX sockets are not available on this platform. Use stdin')
+    return commands
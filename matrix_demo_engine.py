@@ -0,0 +1,553 @@
+#
+#  Animation engine
+#
+#  Owns the matrix, the plot artists and the per-frame drawing pipeline. Both the Tk window
+#  and the headless renderer drive the animation through this object.
+#
+
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
+import numpy as np
+
+# My files
+import matrix_demo_arrow as ma
+import matrix_demo_cache as mca
+import matrix_demo_math as mm
+import matrix_demo_graphics as mg
+import matrix_demo_compositor as mc
+import matrix_demo_strip as msc
+import matrix_demo_timing as mt
+import matrix_demo_trail as mtr
+
+# Thickness of matrix, input, and output vectors
+VECTOR_THICKNESS = 30
+# If true, then arrow color matches the color of circumference circles. Otherwise, remains default red/purple
+ARROW_COLORS_MATCH_CIRCUMFERENCE_CIRCLES = False
+#  If true, then text color matches the color of circumference circles. Otherwise, remains default red/purple
+TEXT_COLORS_MATCH_CIRCUMFERENCE_CIRCLES = False
+# Refresh on-screen timing statistics this often, rather than every frame
+TIMING_REFRESH_FRAMES = 30
+# Speed slider moves animation by animation_speed / 25 steps per frame at this frame rate. Animation then
+# advances by wall-clock time at that rate, whatever rate frames are actually drawn at.
+SPEED_FRAME_RATE = 60
+
+
+# Starting matrix: unit rows fanned evenly over half a circle. Rounded, so 2 rows give exactly the identity matrix
+def initial_matrix(rows):
+    angles = np.arange(rows) * np.pi / rows
+    return np.round(np.column_stack((np.cos(angles), np.sin(angles))), 12)
+
+
+# Everything about the orbit that doesn't depend on the window: unit circle, dots, and geometry for the
+# starting matrix. Can run in another thread while the window is being created.
+def precompute_orbit(stepsPerOrbit, dotsPerOrbit, rows):
+    u = mm.UnitCircleStuff(stepsPerOrbit, dotsPerOrbit, mg.CIRCUMFERENCE_COLOR1, mg.CIRCUMFERENCE_COLOR2)
+    u.updateOrbit(initial_matrix(rows))
+    return u
+
+
+# Whether a baked background's key differs from the one it was baked for only in having more dots shown, which
+# is at position index. If so, the new dots can just be drawn over it.
+def only_dots_grew(bakedKey, key, index):
+    return (bakedKey is not None and bakedKey[index] < key[index] and
+            bakedKey[:index] + bakedKey[index + 1:] == key[:index] + key[index + 1:])
+
+
+class AnimationEngine:
+
+    # Orbit comes from precompute_orbit(), or is computed here if None
+    def __init__(self, canvas, textObj, stepsPerOrbit=400, dotsPerOrbit=40, orbit=None):
+        self.canvas = canvas
+        self.textObj = textObj
+
+        # N x 2 matrix. Each row is a direction vector, whose dot product with input vector is one output
+        self.numRows = mg.settings.matrixRows
+        self.Array1 = initial_matrix(self.numRows)
+
+        # Determine steps between circumference dots
+        self.u = orbit if orbit is not None else precompute_orbit(stepsPerOrbit, dotsPerOrbit, self.numRows)
+        self.stepsPerOrbit = self.u.numsteps  # This might be changed, to be an integer multiple of dotsPerOrbit
+        print('Total steps {:d}, circumference dots {:d}'.format(self.u.numsteps, self.u.numdots))
+
+        # Create plots, and save background bitmaps so we don't have to redraw them over and over.
+        # This greatly speeds up animation
+        self.panels = mg.create_initial_graphics(canvas, self.numRows)
+        ax1 = self.panels.ax1
+        ax2 = self.panels.ax2
+
+        # Write array values with specified y-coordinate
+        self.textObj.update_array_text(self.Array1)
+
+        # Add one arrow per matrix row to top-right graph. These only move when matrix changes, so are
+        # drawn into the background rather than every frame. Thinner if there are many, so they don't pile up
+        self.matrixArrows = []
+        thickness = VECTOR_THICKNESS * min(1, 2 / np.sqrt(self.numRows))
+        for r, color in enumerate(mg.row_colors(self.numRows)):
+            self.matrixArrows.append(ma.Arrow((0, 0), tuple(self.Array1[r, :]),
+                                              color=color,
+                                              mutation_scale=thickness))  # Thickness
+            ax1.add_patch(self.matrixArrows[r])
+
+        # Add circumference dots. Geometry for every step of the orbit was precomputed
+        self.u.makeCircs(self.Array1, mg.OUTPUT_VECTOR_COLOR, ax1, ax2)
+
+        # Warped grid and circle in output plot follow the first two rows
+        self.panels.warpTransform.set_matrix(self.warp_matrix())
+
+        # Orbits of recently seen matrices, starting with this one
+        self.orbitCache = mca.OrbitCache(mg.settings.orbitCacheMB * 1e6, self.u.numsteps, self.u.numdots)
+        self.orbitCache.store(self.Array1, self.u.orbitArrays(), mg.fmt_array(self.Array1))
+
+        self.currentStep = 0
+        self.currentStepFloat = 0.0
+        self.cycles = 0
+        self.matrixVersion = 0  # Incremented whenever matrix changes
+
+        # Create input/output arrows
+        self.arrowInput = ma.Arrow((0, 0), (0, 0),
+                                   color=mg.INPUT_VECTOR_COLOR,
+                                   mutation_scale=VECTOR_THICKNESS)
+        self.arrowOutput = ma.Arrow((0, 0), (0, 0),
+                                    color=mg.OUTPUT_VECTOR_COLOR,
+                                    mutation_scale=VECTOR_THICKNESS)
+        ax1.add_patch(self.arrowInput)
+        ax2.add_patch(self.arrowOutput)
+
+        # Add "shadow" and perpendicular "normal" lines to input axis, one segment per matrix row
+        self.lineNormal = ax1.add_collection(LineCollection([],
+                                                           colors=[(0.5, 0.5, 0.5)],
+                                                           linestyles=':'),  # Dotted line
+                                             autolim=False)
+        self.lineShadow = ax1.add_collection(LineCollection([],
+                                                           linewidths=3,
+                                                           linestyles='--',  # Dashed line
+                                                           colors=mg.shadow_colors(self.numRows)),
+                                             autolim=False)
+
+        # Add shadow lines to output axis. Output plot shows the first two dot products
+        self.lineOutputX = ax2.add_line(Line2D([0, 0], [1, 1],
+                                               linewidth=3,
+                                               color=mg.SHADOW1_COLOR))
+        self.lineOutputY = ax2.add_line(Line2D([0, 0], [1, 1],
+                                               linewidth=3,
+                                               color=mg.SHADOW2_COLOR))
+
+        # Everything above is drawn by us, every frame or into baked backgrounds. Keep it out of full canvas
+        # draws, so that backgrounds can be recaptured after any full draw.
+        for artist in self.matrixArrows + [self.arrowInput, self.arrowOutput, self.lineNormal, self.lineShadow,
+                                           self.lineOutputX, self.lineOutputY]:
+            artist.set_animated(True)
+
+        # Only redraw and blit panels that changed
+        self.compositor = mc.Compositor(canvas)
+        self.compositor.add_panel('text', self.textObj.ax_text.bbox, self.textObj.current_background)
+        self.compositor.add_panel('bar', self.panels.axBar.bbox, self.background_bar)
+        self.compositor.add_panel('ax1', ax1.bbox, self.background1)
+        self.compositor.add_panel('ax2', ax2.bbox, self.background2)
+
+        # Grid, matrix arrows and circumference dots are baked into copies of the x-y plot backgrounds. These
+        # record what was baked.
+        self.dotsVisible = False
+        self.warpVisible = False
+        self.bakedKey1 = None
+        self.bakedKey2 = None
+
+        # Fading trails behind output vector tip, and optionally input vector tip. Drawn onto accumulation layers
+        # over the backgrounds above, one segment per frame
+        self.trail1 = mtr.Trail(ax1, mg.INPUT_VECTOR_COLOR, mg.settings.trailLength)
+        self.trail2 = mtr.Trail(ax2, mg.OUTPUT_VECTOR_COLOR, mg.settings.trailLength)
+        self.trailsShown = (False, False)  # Whether each trail was showing last frame
+
+        # Scrolling history of dot products, shown in place of bars. Drawn onto a layer over bar chart background,
+        # scrolled a few pixels per frame
+        self.strip = msc.StripChart(self.panels.axBar, mg.bar_colors(self.numRows), self.numRows,
+                                    mg.settings.stripOrbits * self.u.numsteps)
+        self.stripShown = False  # Whether strip chart was showing last frame
+
+        # Window resizes and DPI changes (e.g. moving to another monitor) make saved backgrounds stale. Any full
+        # draw, ours or the backend's, recaptures them.
+        self.drawnKey = None  # Figure size and DPI as of last full draw. First frame asks for one
+        canvas.mpl_connect('resize_event', self.on_resize)
+        canvas.mpl_connect('draw_event', self.on_draw)
+
+        # Time spent in each stage of a frame
+        self.timer = mt.StageTimer()
+        self.frames = 0
+        self.droppedFrames = 0  # Frame deadlines missed, counted by whoever drives the clock
+        self.timingText = ''  # Statistics shown on screen, if any
+
+    # Draw one complete frame: text panel, bar chart, input and output plots. Panels whose contents
+    # haven't changed since last frame are skipped by the compositor. Returns False if the frame was skipped
+    # while waiting for a full canvas draw, so nothing was drawn or blitted.
+    def draw_frame(self):
+        if mg.settings.flagStrip != self.stripShown:
+            self.show_strip(mg.settings.flagStrip)
+
+        # Saved backgrounds don't fit canvas after a resize or DPI change. Ask for a full draw, which recaptures
+        # them. Backends that already have one pending (e.g. Tk, right after resizing) don't draw again. Until
+        # then, skip frames.
+        if self.drawnKey != self.figure_key():
+            self.canvas.draw_idle()
+            if self.drawnKey != self.figure_key():
+                return False
+
+        settings = mg.settings
+        panels = self.panels
+        comp = self.compositor
+        u = self.u
+        timer = self.timer
+        currentStep = self.currentStep
+
+        timer.begin()
+
+        # V1 is "input" vector in top-right plot
+        vector_input = [u.unitVectorX[currentStep], u.unitVectorY[currentStep]]
+
+        # All N dot products. Orbit geometry was precomputed by updateOrbit, in one batched product per matrix.
+        # Transformed vector in lower-right plot is the first two.
+        vector_output = u.outputVectors[currentStep]
+        rows = settings.matrixRowsToShow
+        timer.mark('math')
+
+        # During first orbit, lay down circumference dots on input and output x-y plots as we pass them
+        if self.cycles == 0:
+            dotsPassed = currentStep // u.stepsPerDot + 1
+            if dotsPassed > u.dotsShown:
+                u.showDots(dotsPassed)
+
+        # Input dots only change when a new one is laid down. Output dots also change with the matrix.
+        self.dotsVisible = settings.flagCircum and rows > 1
+        self.warpVisible = settings.flagWarp and rows > 1
+        self.bake_backgrounds(rows)
+        timer.mark('dots')
+
+        self.update_trails(vector_input, vector_output, rows)
+        timer.mark('trail')
+
+        # Live timing statistics, if showing
+        if settings.flagShowTiming:
+            if self.frames % TIMING_REFRESH_FRAMES == 0 or not self.timingText:
+                self.timingText = '\n'.join(timer.summary_lines() + ['dropped frames {:d}'.format(self.droppedFrames)])
+        else:
+            self.timingText = ''
+        self.frames = self.frames + 1
+
+        # Everything shown depends on these. Each panel adds whatever else it depends on.
+        frameKey = (currentStep, self.matrixVersion, rows)
+
+        # Text in top-left. Timing statistics are part of the panel's background, so set them first
+        self.textObj.update_timing_text(self.timingText)
+        if comp.begin_panel('text', frameKey + (settings.flagCircum, self.timingText)):
+            # Update input vector text
+            if settings.flagCircum:
+                # Use rainbow color for text
+                if TEXT_COLORS_MATCH_CIRCUMFERENCE_CIRCLES:
+                    self.textObj.update_input_vector(vector_input, u.stepColors[currentStep])
+                else:
+                    self.textObj.update_input_vector(vector_input, mg.INPUT_VECTOR_COLOR)
+            else:
+                # Input text color matches vector
+                self.textObj.update_input_vector(vector_input, mg.INPUT_VECTOR_COLOR)
+
+            # Update output vector text
+            self.textObj.update_output_vector(vector_output, rows)
+            timer.mark('text update')
+
+            # Draw text
+            self.textObj.draw_artists()
+        timer.mark('text redraw')
+
+        # Bar chart, or strip chart of recent dot products
+        self.update_strip(rows)
+        if comp.begin_panel('bar', frameKey + (self.stripShown,)) and not self.stripShown:
+            # Top corners of each bar are at its dot product
+            barVerts = panels.barVerts[:rows]
+            barVerts[:, 1:3, 1] = vector_output[:rows, None]
+            panels.bars.set_verts(barVerts)
+            panels.axBar.draw_artist(panels.bars)
+        timer.mark('bar chart')
+
+        plotKey = frameKey + (settings.flagCircum, settings.flagShadow, u.dotsShown, self.trailsShown,
+                              self.warpVisible)
+
+        if ARROW_COLORS_MATCH_CIRCUMFERENCE_CIRCLES and settings.flagCircum:
+            # If showing circumference colors, then make arrows black, which is less distracting
+            self.arrowInput.set_color('k')
+            self.arrowOutput.set_color('k')
+        else:
+            # IF not showing circumference dots, then arrows are red/purple
+            self.arrowInput.set_color(mg.INPUT_VECTOR_COLOR)
+            self.arrowOutput.set_color(mg.OUTPUT_VECTOR_COLOR)
+
+        # Draw top-right "INPUT VECTOR" graph. Matrix arrows and circumference dots, if showing, are already in background
+        if comp.begin_panel('ax1', plotKey):
+            self.arrowInput.set_positions((0, 0), tuple(vector_input))
+            panels.ax1.draw_artist(self.arrowInput)
+
+            if settings.flagShadow:
+                # Draw "shadow" projections, and lines indicating normal/perpendicular, for every row showing
+                tips = u.shadowTips[:rows, currentStep]
+                self.lineNormal.set_segments(np.stack((np.broadcast_to(vector_input, tips.shape), tips), axis=1))
+                self.lineShadow.set_segments(np.stack((np.zeros_like(tips), tips), axis=1))
+                panels.ax1.draw_artist(self.lineNormal)
+                panels.ax1.draw_artist(self.lineShadow)
+        timer.mark('ax1 draw')
+
+        # Draw bottom-right graph elements, if needed
+        if comp.begin_panel('ax2', plotKey):
+            # Head shrinks with short output vectors. Its corners are only recomputed when that happens
+            if rows > 1:
+                self.arrowOutput.set_positions((0, 0), (vector_output[0], vector_output[1]))
+                self.arrowOutput.set_head_length(min(abs(vector_output[0]) + abs(vector_output[1]), 0.5))
+            else:
+                # Output (purple) arrow is horizontal
+                self.arrowOutput.set_positions((0, 0), (vector_output[0], 0))
+                self.arrowOutput.set_head_length(min(abs(vector_output[0]), 0.5))
+
+            # Draw output vectors
+            if settings.flagShadow:
+                # [x1, x2], [y1, y2] draws horizontal line
+                self.lineOutputX.set_data([0, vector_output[0]], [0, 0])
+
+                if rows > 1:
+                    self.lineOutputY.set_data([vector_output[0], vector_output[0]], [0, vector_output[1]])
+                else:
+                    self.lineOutputY.set_data([vector_output[0], vector_output[0]], [0, 0])
+                panels.ax2.draw_artist(self.lineOutputX)
+                panels.ax2.draw_artist(self.lineOutputY)
+
+            # Purple circle patches are already in background, if showing
+            panels.ax2.draw_artist(self.arrowOutput)
+        timer.mark('ax2 draw')
+
+        # Render changed panels to screen
+        comp.blit()
+        timer.mark('blit')
+        return True
+
+    # Size and DPI of figure. Backgrounds saved at any other size and DPI are stale
+    def figure_key(self):
+        figure = self.canvas.figure
+        return tuple(figure.bbox.bounds), figure.dpi
+
+    # Window was resized. Wake scheduler, so next frame notices even if paused
+    def on_resize(self, _event=None):
+        mg.settings.changed()
+
+    # Full canvas draw finished. Canvas holds only static elements, so save any backgrounds whose bbox changed
+    # (and anything baked from them), then repaint every panel, since the draw painted over them.
+    def on_draw(self, _event=None):
+        saved = self.panels.save_backgrounds(self.canvas)
+        if 'bg1' in saved:
+            self.bakedKey1 = None
+        if 'bg2' in saved:
+            self.bakedKey2 = None
+        self.textObj.save_background()
+        self.trail1.invalidate()
+        self.trail2.invalidate()
+        self.strip.invalidate()
+
+        self.drawnKey = self.figure_key()
+        self.compositor.invalidate()
+        mg.settings.changed()
+
+    # Rasterize grids, matrix arrows and circumference dots into copies of the x-y plot backgrounds, but only if
+    # they changed since last time. Frames then restore those copies, so cost doesn't depend on how many rows,
+    # lines or dots there are. While the first orbit lays dots down, only the new ones are drawn, over the dots
+    # baked so far, so cost doesn't grow with the number of dots either.
+    def bake_backgrounds(self, rows):
+        canvas = self.canvas
+        panels = self.panels
+        u = self.u
+
+        dotsShown = u.dotsShown if self.dotsVisible else 0
+        key1 = (rows, dotsShown, self.matrixVersion, self.warpVisible)
+        if self.bakedKey1 != key1:
+            # Matrix arrows go over the dots, so dots are baked into a layer of their own first
+            if only_dots_grew(self.bakedKey1, key1, 1):
+                canvas.restore_region(panels.bg1Dots)
+                u.drawDots(u.dots1, panels.ax1, self.bakedKey1[1], dotsShown)
+            else:
+                canvas.restore_region(panels.bg1)
+                if self.warpVisible:
+                    panels.ax1.draw_artist(panels.grid1)
+                if dotsShown:
+                    panels.ax1.draw_artist(u.dots1)
+            panels.bg1Dots = canvas.copy_from_bbox(panels.ax1.bbox)
+            for arrow in self.matrixArrows[:rows]:
+                panels.ax1.draw_artist(arrow)
+            panels.bg1Static = canvas.copy_from_bbox(panels.ax1.bbox)
+            self.bakedKey1 = key1
+
+        key2 = (dotsShown, self.matrixVersion, self.warpVisible)
+        if self.bakedKey2 != key2:
+            if only_dots_grew(self.bakedKey2, key2, 0):
+                canvas.restore_region(panels.bg2Static)
+                u.drawDots(u.dots2, panels.ax2, self.bakedKey2[0], dotsShown)
+            else:
+                canvas.restore_region(panels.bg2)
+                if self.warpVisible:
+                    panels.ax2.draw_artist(panels.warpGrid)
+                    panels.ax2.draw_artist(panels.warpCircle)
+                if dotsShown:
+                    panels.ax2.draw_artist(u.dots2)
+            panels.bg2Static = canvas.copy_from_bbox(panels.ax2.bbox)
+            self.bakedKey2 = key2
+
+    # Background of input plot, with input trail if showing
+    def background1(self):
+        return self.trail1.layer if self.trailsShown[0] else self.panels.bg1Static
+
+    # Background of output plot, with output trail if showing
+    def background2(self):
+        return self.trail2.layer if self.trailsShown[1] else self.panels.bg2Static
+
+    # Background of bar chart, with strip chart if showing
+    def background_bar(self):
+        return self.strip.layer if self.stripShown else self.panels.bgBar
+
+    # Swap bars for strip chart, or back. Relabelling the axes needs a full canvas draw, so frames wait for one,
+    # as after a resize. History starts afresh whenever strip chart is turned on.
+    def show_strip(self, shown):
+        settings = mg.settings
+        self.stripShown = shown
+        if shown:
+            self.strip.set_length(settings.stripOrbits * self.u.numsteps)
+        mg.label_bar_axes(self.panels, self.numRows, settings.stripOrbits if shown else 0)
+        self.panels.savedKeys.pop('bgBar', None)  # Same bbox, but labels changed, so save it again
+        self.drawnKey = None
+
+    # Sample dot products for strip chart, if showing, and scroll it
+    def update_strip(self, rows):
+        if self.stripShown:
+            # Last output vector is the first again, a full turn round, so leave it out of the orbit
+            self.strip.add_step(self.cycles * self.stepsPerOrbit + self.currentStep,
+                                self.u.outputVectors[:self.stepsPerOrbit])
+            self.strip.render(self.panels.bgBar, rows)
+
+    # Add tip positions to trails, if showing, whenever they move. Each addition draws one new segment onto the
+    # trail's layer, whatever the trail length. Trails start afresh whenever they are turned on.
+    def update_trails(self, vector_input, vector_output, rows):
+        settings = mg.settings
+        shown = (settings.flagTrail and settings.flagInputTrail, settings.flagTrail)
+        for trail, wasShown, isShown in zip((self.trail1, self.trail2), self.trailsShown, shown):
+            if isShown and not wasShown:
+                trail.set_length(settings.trailLength)
+        self.trailsShown = shown
+
+        # Output tip is on x axis if only one row is showing
+        bases = (self.panels.bg1Static, self.panels.bg2Static)
+        tips = (vector_input, (vector_output[0], vector_output[1] if rows > 1 else 0))
+        for trail, isShown, base, tip in zip((self.trail1, self.trail2), shown, bases, tips):
+            if not isShown:
+                continue
+            trail.add(tip[0], tip[1])
+            trail.render(base)
+
+    # Apply pending mouse input. Matrix changes at most once per frame, from the latest mouse position only
+    def apply_input(self):
+        settings = mg.settings
+        if settings.flagMouseDownOnset:
+            # Onset of mouse click. Clear flag so we don't come back
+            settings.flagMouseDownOnset = False
+            self.select_row_to_adjust()
+        if settings.flagChangeMatrix:
+            self.change_matrix()
+
+    # Onset of mouse click. Decide which matrix row the mouse will drag: the nearest one showing
+    def select_row_to_adjust(self):
+        settings = mg.settings
+        rows = self.Array1[:settings.matrixRowsToShow]
+
+        # Squared distance from mouse cursor to tip of each row vector. Ties go to the lower row
+        distances = (rows[:, 0] - settings.flagX) ** 2 + (rows[:, 1] - settings.flagY) ** 2
+        settings.whichRowToAdjust = int(np.argmin(distances))
+
+    # Apply pending matrix change from mouse or orthogonal checkbox. Returns False if nothing changed.
+    def change_matrix(self):
+        settings = mg.settings
+        Array1 = self.Array1
+
+        settings.flagRecalc = False
+        settings.flagChangeMatrix = False
+        r = settings.whichRowToAdjust
+        if r == -1:
+            # Force row1 to be orthogonal to row0
+            Array1[1, 0] = -Array1[0, 1]
+            Array1[1, 1] = Array1[0, 0]
+        elif r == -2:
+            # Force unit vector ... currently not used, but can resurrect
+            Array1[:, :] = Array1 / np.linalg.norm(Array1, axis=1, keepdims=True)
+        elif settings.flagX is not None and settings.flagY is not None:
+            # Because x, y won't be valid if mouse went out of bounds
+            # User is using mouse to draw matrix vectors
+            Array1[r, 0] = settings.flagX
+            Array1[r, 1] = settings.flagY
+
+            if settings.keep_ortho and r < 2:
+                # Force other arrow of first two to be 90 degrees counterclockwise from the one being adjusted
+                target = 1 - r
+                Array1[target, 0] = -Array1[r, 1]
+                Array1[target, 1] = Array1[r, 0]
+        else:
+            # Nothing was changed after all.
+            return False
+
+        self.matrix_changed()
+        return True
+
+    # Replace whole matrix, e.g. from a script rather than the mouse
+    def set_matrix(self, array):
+        self.Array1[:, :] = array
+        self.matrix_changed()
+
+    # Bring everything that depends on matrix up to date. If matrix was seen recently, orbit comes from the
+    # cache, and matrix snaps to the cached one, which is within the cache's rounding
+    def matrix_changed(self):
+        entry = self.orbitCache.lookup(self.Array1)
+        if entry:
+            self.Array1[:, :] = entry.matrix
+            self.u.restoreOrbit(entry.orbit)
+            texts = entry.texts
+        else:
+            self.u.updateCircs(self.Array1)
+            self.u.updateOrbit(self.Array1)
+            texts = mg.fmt_array(self.Array1)
+            self.orbitCache.store(self.Array1, self.u.orbitArrays(), texts)
+
+        for r in range(0, self.numRows):
+            self.matrixArrows[r].set_positions((0, 0), tuple(self.Array1[r, :]))
+        self.panels.warpTransform.set_matrix(self.warp_matrix())
+        self.textObj.set_array_text(texts)
+        self.matrixVersion = self.matrixVersion + 1
+
+    # First two matrix rows as an affine transform, which maps input plot coordinates to output plot's
+    def warp_matrix(self):
+        matrix = np.identity(3)
+        matrix[:2, :2] = self.Array1[:2]
+        return matrix
+
+    # Jump to a position, in steps since start of animation, e.g. to render frames out of order. Circumference
+    # dots are shown as if animation had run up to there.
+    def seek(self, stepFloat):
+        self.cycles = int(stepFloat // self.stepsPerOrbit)
+        self.currentStepFloat = stepFloat - self.cycles * self.stepsPerOrbit
+        self.currentStep = int(self.currentStepFloat)
+        if self.cycles == 0:
+            self.u.showDots(self.currentStep // self.u.stepsPerDot + 1)
+        else:
+            self.u.showDots(self.u.numdots)
+
+    # Move animation forward by elapsed wall-clock time, at the rate set by the speed slider. Late frames skip
+    # steps rather than slowing animation down. Default is one frame at SPEED_FRAME_RATE, for offscreen runs
+    # that should draw the same frames on any machine.
+    def advance(self, seconds=1 / SPEED_FRAME_RATE):
+        self.currentStepFloat = self.currentStepFloat + mg.settings.animation_speed / 25 * (SPEED_FRAME_RATE * seconds)
+
+        if self.currentStepFloat >= self.u.numsteps:
+            # Might have passed more than one orbit, if very late
+            orbits = int(self.currentStepFloat // self.stepsPerOrbit)
+            self.cycles = self.cycles + orbits
+            self.currentStepFloat = self.currentStepFloat - orbits * self.stepsPerOrbit
+
+        self.currentStep = int(self.currentStepFloat)
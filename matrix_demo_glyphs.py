@@ -0,0 +1,97 @@
+#
+#  Glyph cache for the matrix/vector text panel
+#
+#  Text in the top-left panel only ever uses a few characters (digits, sign, brackets, comma, period), in
+#  one monospace font. Rather than have Agg lay out and rasterize every string every frame, we rasterize
+#  each character once, and build strings by pasting cached glyph bitmaps side by side.
+#
+
+import numpy as np
+from matplotlib.backends.backend_agg import RendererAgg
+from matplotlib.colors import to_rgba
+from matplotlib.font_manager import FontProperties
+
+# Every character that fmt(), fmt_bracket() and fmt_row() produce
+CHARSET = '0123456789+-[],. '
+
+# Blank pixels around each glyph, so antialiased edges and overhangs aren't clipped
+PAD = 4
+
+
+class GlyphCache:
+
+    def __init__(self, family, size, dpi):
+        self.family = family
+        self.size = size
+        self.dpi = dpi
+        self.prop = FontProperties(family=family, size=size)
+
+        # Measure font using the same renderer that will draw glyphs. Monospace, so every advance is the same.
+        r = RendererAgg(1, 1, dpi)
+        width, height, descent = r.get_text_width_height_descent(CHARSET, self.prop, ismath=False)
+        self.advance = width / len(CHARSET)
+
+        # Each glyph cell is big enough for any character, with baseline at a fixed row
+        self.cellWidth = int(np.ceil(self.advance)) + 2 * PAD
+        self.cellHeight = int(np.ceil(height)) + 2 * PAD
+        self.baseline = self.cellHeight - int(np.ceil(descent)) - PAD  # Rows from top of cell
+
+        # Glyph bitmaps as coverage (alpha) in 0..1, keyed by character and sub-pixel position. Agg renders
+        # text at fractional positions, so a glyph is rasterized once for each position it is used at.
+        self.glyphs = {}
+
+    # True if cache can draw text with this font
+    def matches(self, family, size, dpi):
+        return (family, size, dpi) == (self.family, self.size, self.dpi)
+
+    # True if cache can draw every character of string
+    @staticmethod
+    def can_draw(s):
+        return all([ch in CHARSET for ch in s])
+
+    # Rasterize a character with its left end of baseline at fx, fy pixels into its cell. fy is measured down from top.
+    def get_glyph(self, ch, fx, fy):
+        key = (ch, fx, fy)
+        if key not in self.glyphs:
+            r = RendererAgg(self.cellWidth + 1, self.cellHeight + 1, self.dpi)
+            gc = r.new_gc()
+            gc.set_foreground((0, 0, 0))
+            r.draw_text(gc, PAD + fx, self.baseline + fy, ch, self.prop, 0)
+            gc.restore()
+            self.glyphs[key] = np.asarray(r.buffer_rgba())[:, :, 3] / 255
+        return self.glyphs[key]
+
+    # Draw string with left end of baseline at x, y in display pixels
+    def draw(self, renderer, s, x, y, color):
+        # Work in whole pixels measured down from top, like Agg's text renderer. Fractions pick the glyph bitmaps.
+        y = renderer.height - y
+        left = int(np.floor(x))
+        top = int(np.floor(y))
+        fy = round(y - top, 2)
+
+        # Paste glyphs side by side. Neighbouring cells overlap in their padding, so keep the max coverage
+        alpha = np.zeros((self.cellHeight + 1, int(np.ceil(len(s) * self.advance)) + self.cellWidth + 1))
+        for i, ch in enumerate(s):
+            xi = x + i * self.advance
+            col = int(np.floor(xi))
+            glyph = self.get_glyph(ch, round(xi - col, 2), fy)
+            cell = alpha[:, col - left:col - left + glyph.shape[1]]
+            np.maximum(cell, glyph, out=cell)
+
+        rgba = np.empty(alpha.shape + (4,), dtype=np.uint8)
+        r, g, b, a = to_rgba(color)
+        rgba[:, :, 0] = int(r * 255)
+        rgba[:, :, 1] = int(g * 255)
+        rgba[:, :, 2] = int(b * 255)
+        rgba[:, :, 3] = np.round(alpha * a * 255)
+
+        # Images are positioned by their bottom left corner, measured up from bottom, with bottom row first
+        gc = renderer.new_gc()
+        bottom = renderer.height - (top - self.baseline + alpha.shape[0])
+        renderer.draw_image(gc, left - PAD, bottom, rgba[::-1])
+        gc.restore()
+
+    # Draw a Text artist, which must use left/baseline alignment and no rotation
+    def draw_text_artist(self, renderer, text):
+        x, y = text.get_transform().transform(text.get_position())
+        self.draw(renderer, text.get_text(), x, y, text.get_color())
@@ -1,17 +1,27 @@
-import tkinter as tk
-from tkinter import ttk
+from time import perf_counter_ns
+
 import matplotlib.pyplot as plt
 import matplotlib as mpl
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.patches import PathPatch
+from matplotlib.path import Path
+from matplotlib.transforms import Affine2D
 import numpy as np
 
-import global_vars as gv
+# My files
+import matrix_demo_glyphs as mgl
+
+# Tkinter is imported by GraphicsObjects, so offscreen runs don't load it. Headless servers often don't ship Tk.
+tk = ttk = None
 
 axisLimit = 2  # Coordinate limits for x-y plots
 
 # Font
 FONT_FAMILY = 'monospace'
+# Font size for a screen height of 1400 pixels
+BASE_FONT_SIZE = 15
 # This will be scaled to screen size once that is determined
-FONT_SIZE = 15
+FONT_SIZE = BASE_FONT_SIZE
 
 # Text coordinates, horizontal
 TEXT_INPUT_MATRIX_X = 0
@@ -36,6 +46,30 @@ MATRIX_ROW2_COLOR = (0.25, 0.75, 0.25)  # Light green
 SHADOW1_COLOR = (0, 0, 0.5)
 SHADOW2_COLOR = (0, 0.35, 0)
 
+BAR1_COLOR = (0, 0, 1)  # Blue
+BAR2_COLOR = (0, 0.5, 0)  # Green
+
+BAR_HALF_WIDTH = 0.4  # Bars are centered on row number
+
+
+# Colors for n matrix rows, as an (n, 3) array. First two rows use their own colors, and the rest cycle
+# through a colormap.
+def row_colors(n, row1_color=MATRIX_ROW1_COLOR, row2_color=MATRIX_ROW2_COLOR):
+    colors = np.array(plt.get_cmap('tab10')(np.arange(n) % 10))[:, :3]
+    colors[:2] = [row1_color, row2_color][:n]
+    return colors
+
+
+# Shadow lines are darker versions of the row colors
+def shadow_colors(n):
+    colors = row_colors(n) * 0.5
+    colors[:2] = [SHADOW1_COLOR, SHADOW2_COLOR][:n]
+    return colors
+
+
+def bar_colors(n):
+    return row_colors(n, BAR1_COLOR, BAR2_COLOR)
+
 
 class Settings:
 
@@ -53,27 +87,81 @@ class Settings:
         self.flagMouseDownOnset = False
         self.flagX = 0  # Indicates mouse x position
         self.flagY = 0  # Indicates mouse y position
-        self.matrixRowsToShow = 1
+        self.matrixRows = 2  # Rows in matrix. Each row is a direction vector
+        self.matrixRowsToShow = 1  # Either 1, or all rows
         self.whichRowToAdjust = 0
         self.keep_ortho = 0
+        self.flagShowTiming = False  # When true, will show frame timing statistics in text panel
+        self.flagTrail = False  # When true, output vector tip leaves a fading trail
+        self.flagInputTrail = False  # When true, input vector tip leaves one too, if trails are on
+        self.trailLength = 1000  # Positions in a trail. Oldest has faded out completely
+        self.flagStrip = False  # When true, bar chart shows a scrolling history of dot products instead
+        self.stripOrbits = 2  # Orbits of history in strip chart
+        self.flagWarp = False  # When true, output plot shows the unit circle and input grid as warped by the matrix
+        self.orbitCacheMB = 64  # Memory for orbits of recently seen matrices. 0 turns the cache off
+        self.mouseEventTime = None  # perf_counter_ns() when latest mouse position arrived, until a frame shows it
+        self.mouseEventCount = 0  # Mouse positions received since last frame. Frames only use the latest
+        self.listeners = []  # Called whenever a GUI callback changes a setting
+        self.mouseListeners = []  # Called with kind ('press', 'move' or 'release'), x, y of each mouse event used
+
+    # Let listeners (e.g. the frame scheduler) know that something changed, so they can wake up
+    def changed(self):
+        for listener in self.listeners:
+            listener()
 
 
 settings = Settings()
 
 
-# Create initial x-y, text, and bar plots, then save backgrounds
-def create_initial_graphics(canvas):
+# Axes of the three plot panels, plus their saved background bitmaps
+class PlotPanels:
+    def __init__(self):
+        self.ax1 = None  # Top-right input plot
+        self.ax2 = None  # Bottom-right output plot
+        self.axBar = None  # Bottom-left bar plot
+        self.bars = None  # One rectangle per matrix row
+        self.barVerts = None  # Corners of bars, shape (rows, 4, 2). Heights are set every frame
+        self.barXlim = None  # Horizontal limits of bar chart, so they can come back after strip chart
+        self.bg1 = None
+        self.bg2 = None
+        self.bg1Dots = None  # Same as bg1, but with grid and circumference dots (if showing) already drawn
+        self.bg1Static = None  # Same as bg1, but with grid, matrix arrows and circumference dots (if showing) already drawn
+        self.bg2Static = None  # Same as bg2, but with warped grid and circumference dots (if showing) already drawn
+        self.grid1 = None  # Grid lines in input plot
+        self.warpTransform = None  # Matrix, as an affine transform from input plot coordinates to output plot's
+        self.warpGrid = None  # Same grid lines, drawn in output plot through warpTransform
+        self.warpCircle = None  # Unit circle, drawn in output plot through warpTransform. Comes out as an ellipse
+        self.bgBar = None
+        self.savedKeys = {}  # Bbox extents and DPI each background was saved at, by name
+
+    # Save background bitmaps so we don't have to redraw them over and over. Canvas must have just been fully
+    # drawn. Backgrounds whose bbox hasn't changed since they were saved are still good, so are kept.
+    # Returns names of the backgrounds that were saved.
+    def save_backgrounds(self, canvas):
+        saved = []
+        for name, ax in [('bgBar', self.axBar), ('bg1', self.ax1), ('bg2', self.ax2)]:
+            key = (tuple(ax.bbox.extents), ax.figure.dpi)
+            if self.savedKeys.get(name) != key:
+                setattr(self, name, canvas.copy_from_bbox(ax.bbox))
+                self.savedKeys[name] = key
+                saved.append(name)
+        return saved
+
+
+# Create initial x-y, text, and bar plots
+def create_initial_graphics(canvas, numRows=2):
+    panels = PlotPanels()
+
     # Create top-right plot with dashed unit circle
     th = np.linspace(0, 2 * np.pi, 201)
     plt.subplot(222)
-    gv.ax1 = plt.gca()
+    panels.ax1 = plt.gca()
     plt.plot(np.cos(th), np.sin(th), 'k--')  # Make dashed circle
     plt.xlim([-axisLimit, axisLimit])
     plt.ylim([-axisLimit, axisLimit])
     plt.title("Input vectors\n(use mouse to drag vectors)")
     plt.xlabel("First dimension")
     plt.ylabel("Second dimension")
-    plt.show(block=False)
 
     linex = np.linspace(-1, 1, 9)
     lines = []
@@ -82,42 +170,81 @@ def create_initial_graphics(canvas):
         #        plt.plot([linex[i], linex[i]], [-axisLimit, axisLimit], '--', color="grey")
         lines.append([(-axisLimit, linex[i]), (axisLimit, linex[i])])
         lines.append([(linex[i], -axisLimit), (linex[i], axisLimit)])
+    # Animated, so that full canvas draws leave the grid out of the background, until asked for
+    panels.grid1 = panels.ax1.add_collection(LineCollection(lines, colors='grey', linewidths=0.5, linestyles='--',
+                                                            animated=True), autolim=False)
 
     # Create bottom-left bar plot
     plt.subplot(223)
-    gv.axBar = plt.gca()
-    gv.barlist = plt.bar([0, 1], [0, 0])
-    gv.barlist[0].set_color('b')
-    gv.barlist[1].set_color('g')
-    plt.xticks([0, 1], ['Matrix row 1 * unit vector', 'Matrix row 2 * unit vector'])
+    panels.axBar = plt.gca()
+    rowNumbers = np.arange(numRows)
+    panels.barVerts = np.zeros((numRows, 4, 2))
+    panels.barVerts[:, :, 0] = rowNumbers[:, None] + np.array([-1, -1, 1, 1]) * BAR_HALF_WIDTH
+    # Animated, so that full canvas draws leave bars out of the background
+    panels.bars = PolyCollection(panels.barVerts, facecolors=bar_colors(numRows), edgecolors='face', animated=True)
+    panels.axBar.add_collection(panels.bars)
+    panels.axBar.autoscale_view()
+    panels.barXlim = panels.axBar.get_xlim()
+    label_bar_axes(panels, numRows, 0)
     plt.ylim([-axisLimit, axisLimit])
     plt.title("Dot product output(s)")
     plt.ylabel("Dot product")
-    plt.show(block=False)
 
     # Create bottom-right output plot with dashed circle
     plt.subplot(224)
-    gv.ax2 = plt.gca()
+    panels.ax2 = plt.gca()
     plt.plot(np.cos(th), np.sin(th), 'k--')  # Make dashed circle
     plt.xlim([-axisLimit, axisLimit])
     plt.ylim([-axisLimit, axisLimit])
     plt.title("Output vector")
     plt.xlabel("First dimension")
     plt.ylabel("Second dimension")
+
+    # Input grid and unit circle, as the matrix maps them. A matrix change only sets warpTransform, however
+    # many lines there are, and the circle's image is an exact ellipse rather than a ring of sampled dots
+    panels.warpTransform = Affine2D()
+    panels.warpGrid = panels.ax2.add_collection(LineCollection(lines, colors='grey', linewidths=0.5, linestyles='--',
+                                                               transform=panels.warpTransform + panels.ax2.transData,
+                                                               animated=True), autolim=False)
+    panels.warpCircle = panels.ax2.add_patch(PathPatch(Path.unit_circle(), fill=False,
+                                                       edgecolor=OUTPUT_VECTOR_COLOR, linewidth=1.5,
+                                                       transform=panels.warpTransform + panels.ax2.transData,
+                                                       animated=True))
     plt.show(block=False)
 
-    # Need this so that background bitmaps will be up to date
-    canvas.draw()
+    # Background bitmaps are saved after the first full canvas draw, which the engine asks for
+    return panels
+
+
+# Label horizontal axis of bottom-left plot, for bars, or for a strip chart of the last stripOrbits orbits.
+# Shows up with the next full canvas draw.
+def label_bar_axes(panels, numRows, stripOrbits):
+    ax = panels.axBar
+    if stripOrbits:
+        ax.set_xlim(-stripOrbits, 0)
+        ticks = np.arange(-stripOrbits, 1)
+        ax.set_xticks(ticks)
+        ax.set_xticklabels([str(-t) for t in ticks])
+        ax.set_xlabel('Orbits ago')
+        return
 
-    # Save background bitmaps
-    gv.bgBar = canvas.copy_from_bbox(gv.axBar.bbox)
-    gv.bg1 = canvas.copy_from_bbox(gv.ax1.bbox)
-    gv.bg2 = canvas.copy_from_bbox(gv.ax2.bbox)
+    ax.set_xlim(panels.barXlim)
+    rowNumbers = np.arange(numRows)
+    if numRows == 2:
+        ax.set_xticks([0, 1])
+        ax.set_xticklabels(['Matrix row 1 * unit vector', 'Matrix row 2 * unit vector'])
+        ax.set_xlabel('')
+    else:
+        # Label every row, unless there are too many to read
+        every = int(np.ceil(numRows / 10))
+        ax.set_xticks(rowNumbers[::every])
+        ax.set_xticklabels([str(r + 1) for r in rowNumbers[::every]])
+        ax.set_xlabel('Matrix row * unit vector')
 
 
 # Mouse button press. Use this to start moving vector1 or vector2 in top-right plot
-def on_mouse_press(event):
-    if event.inaxes != gv.ax1:
+def on_mouse_press(event, ax_input):
+    if event.inaxes != ax_input:
         return
 
     # Left mouse press initiates dragging of matrix.
@@ -125,57 +252,115 @@ def on_mouse_press(event):
         settings.flagMouseDown = True
         settings.flagMouseDownOnset = True
         settings.flagChangeMatrix = True
-        settings.flagX = event.xdata
-        settings.flagY = event.ydata
+        set_mouse_position(event)
+        mouse_event('press', event)
+        settings.changed()
 
 
-def on_mouse_release(event):
-    if event.inaxes != gv.ax1:
+def on_mouse_release(event, ax_input):
+    if event.inaxes != ax_input:
         return
 
     settings.flagMouseDown = False
     settings.flagChangeMatrix = False
+    mouse_event('release', event)
+    settings.changed()
 
 
-def on_mouse_move(event):
-    if event.inaxes != gv.ax1:
+def on_mouse_move(event, ax_input):
+    if event.inaxes != ax_input:
         return
 
     if settings.flagMouseDown:
-        settings.flagX = event.xdata
-        settings.flagY = event.ydata
         settings.flagChangeMatrix = True
+        set_mouse_position(event)
+        mouse_event('move', event)
+        settings.changed()
+
+
+# Keep latest mouse position, overwriting any that a frame hasn't used yet, and note when it arrived so
+# we can measure how long it takes to reach the screen
+def set_mouse_position(event):
+    settings.flagX = event.xdata
+    settings.flagY = event.ydata
+    settings.mouseEventTime = perf_counter_ns()
+    settings.mouseEventCount = settings.mouseEventCount + 1
+
+
+# Let mouse listeners (e.g. a session recorder) know about a mouse event
+def mouse_event(kind, event):
+    for listener in settings.mouseListeners:
+        listener(kind, event.xdata, event.ydata)
 
 
 def do_shadow(_event=None):
     settings.flagShadow = 1 - settings.flagShadow
     settings.flagRecalc = True
+    settings.changed()
 
 
 def do_quit(_event=None):
     settings.quitflag = True
+    settings.changed()
 
 
 def do_animate(_event=None):
     settings.flagAnimate = not settings.flagAnimate
+    settings.changed()
 
 
 def do_show_circle(_event=None):
     settings.flagCircum = not settings.flagCircum
     settings.flagRecalc = True
+    settings.changed()
+
+
+def do_show_timing(_event=None):
+    settings.flagShowTiming = not settings.flagShowTiming
+    settings.changed()
+
+
+def do_trail(_event=None):
+    settings.flagTrail = not settings.flagTrail
+    settings.changed()
+
+
+def do_strip(_event=None):
+    settings.flagStrip = not settings.flagStrip
+    settings.changed()
+
+
+def do_warp(_event=None):
+    settings.flagWarp = not settings.flagWarp
+    settings.changed()
 
 
 def on_keydown(e):
     if e.char == ' ':
         do_animate()
+    elif e.char == 't':
+        do_show_timing()
+    elif e.char == 'd':
+        do_trail()
+    elif e.char == 'w':
+        do_warp()
+    elif e.char == 'b':
+        do_strip()
 
 
-# Keyboard press
-# no longer used
+# Keyboard press in plot window
 def on_keypress(event):
     #    print('key: ', event.key, event.xdata, event.ydata)
     if event.key == " ":
         do_animate()
+    elif event.key == "t":
+        do_show_timing()
+    elif event.key == "d":
+        do_trail()
+    elif event.key == "w":
+        do_warp()
+    elif event.key == "b":
+        do_strip()
 
 
 # Format a single floating point number to have 3 decimals
@@ -193,6 +378,11 @@ def fmt_row(r: np.float64):
     return '[' + fmt(r[0]) + ', ' + fmt(r[1]) + ']'
 
 
+# Format the matrix rows that the text panel shows
+def fmt_array(array):
+    return [fmt_row(r) for r in array[:2]]
+
+
 #
 # Create main windows and canvases for plots and buttons.
 #
@@ -200,7 +390,10 @@ def fmt_row(r: np.float64):
 class GraphicsObjects:
 
     def __init__(self):
-        global FONT_SIZE
+        global FONT_SIZE, tk, ttk
+
+        import tkinter as tk
+        from tkinter import ttk
 
         mpl.use('TkAgg')  # TkAgg doesn't need installing. Works well.
 
@@ -239,7 +432,7 @@ class GraphicsObjects:
         # Create row of buttons. current axis will either be 1 or 2
         self.b_animate = self.add_button('Toggle animate', do_animate)
         # self.b_shadow = self.ButtonMgr.add_button('Toggle projections\n(h)', do_shadow) # This isn't used much
-        self.b_1_vs_2 = self.add_button('Toggle 1 vs 2 row matrix', self.do_1_vs_2)
+        self.b_1_vs_2 = self.add_button('Toggle 1 vs {:d} row matrix'.format(settings.matrixRows), self.do_1_vs_2)
         self.b_circum = self.add_button('Toggle Circumference', do_show_circle)
 
         self.var_ortho = tk.IntVar()
@@ -248,16 +441,11 @@ class GraphicsObjects:
         self.b_quit = self.add_button('Quit', do_quit)
 
         # Font was optimized for screen height of 1440 pixels. Adjust accordingly if screen is different
-        FONT_SIZE = int(FONT_SIZE * self.screen_y / 1400)
+        FONT_SIZE = int(BASE_FONT_SIZE * self.screen_y / 1400)
 
         # Create text objects
         self.textObj = TextObjects(self.fig1)
 
-        # Main plot windows need to respond to mouse events (for dragging vectors)
-        self.canvas1.mpl_connect('button_press_event', on_mouse_press)
-        self.canvas1.mpl_connect('button_release_event', on_mouse_release)
-        self.canvas1.mpl_connect('motion_notify_event', on_mouse_move)
-
         # Windows should respond to key press events
         self.canvas1.mpl_connect('key_press_event', on_keypress)
 
@@ -267,11 +455,9 @@ class GraphicsObjects:
         # Force menu to show, so we can get its width in pixels
         root.update()
 
-        # Move plot window so it doesn't overlap menu buttons
+        # Move plot window so it doesn't overlap menu buttons. If OS resizes it slightly, engine recaptures
+        # background bitmaps
         self.move_window_aside_menu()
-        # Force figure to draw, in case OS wants to resize it slightly (must do this
-        # before drawing the background bitmaps).
-        self.canvas1.draw()
 
         # Initial states
         self.b_circum.state(["disabled"])
@@ -280,6 +466,13 @@ class GraphicsObjects:
 
         plt.figure(1)
 
+    # Main plot window needs to respond to mouse events (for dragging vectors). Called once the
+    # input axes exist, since handlers ignore events outside of it
+    def connect_mouse_events(self, ax_input):
+        self.canvas1.mpl_connect('button_press_event', lambda e: on_mouse_press(e, ax_input))
+        self.canvas1.mpl_connect('button_release_event', lambda e: on_mouse_release(e, ax_input))
+        self.canvas1.mpl_connect('motion_notify_event', lambda e: on_mouse_move(e, ax_input))
+
     def add_button(self, text, func):
         b = ttk.Button(self.frame1, text=text, command=func)
         b.pack(fill=tk.X, ipadx=10, ipady=10, padx=10, pady=5)
@@ -300,6 +493,7 @@ class GraphicsObjects:
         # This will keep permanent toggle, so that future changes to row0 are reflected in row1
         settings.keep_ortho = self.var_ortho.get()
         settings.whichRowToAdjust = -1
+        settings.changed()
 
     def do_speed_slider(self, val):
         # We come here when user moves slider ... generates lots of intermediate callbacks
@@ -308,7 +502,8 @@ class GraphicsObjects:
         self.label_speed['text'] = "Animation speed = " + str(int_val) + "%"
 
     def do_1_vs_2(self):
-        settings.matrixRowsToShow = 3 - settings.matrixRowsToShow  # Toggle between 1 and 2 rows
+        # Toggle between 1 and all rows
+        settings.matrixRowsToShow = settings.matrixRows if settings.matrixRowsToShow == 1 else 1
         settings.flagRecalc = True
         if settings.matrixRowsToShow > 1:
             self.b_circum.state(["!disabled"])
@@ -316,17 +511,38 @@ class GraphicsObjects:
         else:
             self.b_circum.state(["disabled"])
             self.b_orthogonal.config(state=tk.DISABLED)
+        settings.changed()
 
     def reset_size(self):
         # Reduce height so we don't overlap taskbar. PC needs about 5% reduction, MacOS about 10%
-        # If we don't shrink enough, strange things will happen as window may auto-resize slightly,
-        # screwing up the saved bitmaps
+        # If we don't shrink enough, window may auto-resize slightly. Engine recaptures the saved bitmaps
+        # when that happens, but it costs a full redraw
         screen_y_adj = int(self.screen_y * .9)
 
         # Make large square window for main plots
         self.fig1.set_size_inches(screen_y_adj / self.dpi, screen_y_adj / self.dpi)
 
 
+#
+# Offscreen counterpart of GraphicsObjects. Uses the Agg backend, so needs neither Tk nor a display.
+#
+class HeadlessGraphicsObjects:
+
+    def __init__(self, size_pixels=1000, dpi=100):
+        global FONT_SIZE
+
+        mpl.use('Agg')
+
+        self.fig1 = plt.figure(1, figsize=(size_pixels / dpi, size_pixels / dpi), dpi=dpi)
+        self.dpi = dpi
+        self.canvas1 = self.fig1.canvas
+
+        # Scale font the same way as GraphicsObjects, whose figure is 90% of screen height
+        FONT_SIZE = int(BASE_FONT_SIZE * size_pixels / (1400 * .9))
+
+        self.textObj = TextObjects(self.fig1)
+
+
 class TextObjects:
     def __init__(self, _figure):
 
@@ -366,10 +582,35 @@ class TextObjects:
                               TEXT_Y_COORD - TEXT_MATRIX_ROW_Y_SPACING / 2 - TEXT_IN_OUT_Y_OFFSET,
                               '')
 
+        # Frame timing statistics, toggled by "t" key. Bottom of panel, in smaller text
+        self.textObjTiming = self.ax_text.text(0, 0, '', family=FONT_FAMILY, size=FONT_SIZE * 0.6,
+                                               verticalalignment='bottom')
+
+        # Text that changes is drawn every frame, so keep it out of full canvas draws, and therefore the background
+        for text in [self.textObjArrayRow1, self.textObjArrayRow2, self.textObjInputVector1, self.textObjInputVector2,
+                     self.textObjOutputVectorRow1, self.textObjOutputVectorRow2, self.textObjTiming]:
+            text.set_animated(True)
+
         self.set_row1_position()
 
-        self.canvas.draw()  # Need this so that text will render to screen, before we capture background
+        # Cached glyph bitmaps for drawing numbers. Built on first draw, and rebuilt if font size or DPI changes
+        self.glyphs = None
+
+        # Saved after the first full canvas draw
+        self.background = None
+        self.savedKey = None  # Bbox extents and DPI that background was saved at
+        self.timingBackground = None  # Background with timing statistics drawn on it
+        self.timingKey = None  # Text and background that timingBackground was drawn from
+
+    # Save background bitmap, unless panel hasn't moved or changed size since last time. Canvas must have just
+    # been fully drawn. Returns True if saved.
+    def save_background(self):
+        key = (tuple(self.ax_text.bbox.extents), self.fig.dpi)
+        if key == self.savedKey:
+            return False
         self.background = self.canvas.copy_from_bbox(self.ax_text.bbox)
+        self.savedKey = key
+        return True
 
     def make_ax_text(self, x, y, txt, color=None):
         return self.ax_text.text(x, y, txt, color=color, family=FONT_FAMILY, size=FONT_SIZE)
@@ -386,9 +627,13 @@ class TextObjects:
 
     # Write 2x2 array values
     def update_array_text(self, array):
+        self.set_array_text(fmt_array(array))
+
+    # Write matrix rows already formatted by fmt_array()
+    def set_array_text(self, texts):
         self.set_row1_position()
-        self.textObjArrayRow1.set_text(fmt_row(array[0, :]))
-        self.textObjArrayRow2.set_text(fmt_row(array[1, :]))
+        self.textObjArrayRow1.set_text(texts[0])
+        self.textObjArrayRow2.set_text(texts[1])
 
     # Write input vector values
     def update_input_vector(self, vector, new_color=INPUT_VECTOR_COLOR):
@@ -406,18 +651,42 @@ class TextObjects:
             self.textObjOutputVectorRow2.set_text(fmt_bracket(vector[1]))
             self.textObjOutputVectorRow2.set_color(OUTPUT_VECTOR_COLOR)  # MATRIX_ROW2_COLOR)
 
-    def redraw(self):
-        #   axText.draw_artist(axText.patch)  # Erase background
-        # Restore background of text window (upper left)
-        self.canvas.restore_region(self.background)  # Restores static elements and erases background
-        # "draw_artist" draws new objects efficiently, without updating entire plot
-        self.ax_text.draw_artist(self.textObjArrayRow1)
-        self.ax_text.draw_artist(self.textObjOutputVectorRow1)
-        if settings.matrixRowsToShow > 1:
-            self.ax_text.draw_artist(self.textObjArrayRow2)
-            self.ax_text.draw_artist(self.textObjOutputVectorRow2)
-        self.ax_text.draw_artist(self.textObjInputVector1)
-        self.ax_text.draw_artist(self.textObjInputVector2)
+    # Draw text artists. Caller must restore background first, and blit afterwards
+    def draw_artists(self):
+        renderer = self.canvas.get_renderer()
+        if self.glyphs is None or not self.glyphs.matches(FONT_FAMILY, self.textObjArrayRow1.get_fontsize(),
+                                                          self.fig.dpi):
+            self.glyphs = mgl.GlyphCache(FONT_FAMILY, self.textObjArrayRow1.get_fontsize(), self.fig.dpi)
 
-        # Now render to screen
-        self.canvas.blit(self.ax_text.bbox)
+        self.draw_text(renderer, self.textObjArrayRow1)
+        self.draw_text(renderer, self.textObjOutputVectorRow1)
+        if settings.matrixRowsToShow > 1:
+            self.draw_text(renderer, self.textObjArrayRow2)
+            self.draw_text(renderer, self.textObjOutputVectorRow2)
+        self.draw_text(renderer, self.textObjInputVector1)
+        self.draw_text(renderer, self.textObjInputVector2)
+
+    # Draw text from cached glyphs. Falls back to "draw_artist" for anything else, e.g. "nan"
+    def draw_text(self, renderer, text):
+        if self.glyphs.can_draw(text.get_text()):
+            self.glyphs.draw_text_artist(renderer, text)
+        else:
+            self.ax_text.draw_artist(text)
+
+    # Write frame timing statistics, or nothing to hide them
+    def update_timing_text(self, text):
+        self.textObjTiming.set_text(text)
+
+    # Background to restore before drawing text, with timing statistics on it if showing. Laying out the
+    # statistics table takes far longer than a frame, and it only changes every so often, so it is drawn once
+    # onto a copy of the background, and that copy is reused until text or background changes.
+    def current_background(self):
+        text = self.textObjTiming.get_text()
+        if not text:
+            return self.background
+        if self.timingKey != (text, self.background):
+            self.canvas.restore_region(self.background)
+            self.ax_text.draw_artist(self.textObjTiming)
+            self.timingBackground = self.canvas.copy_from_bbox(self.ax_text.bbox)
+            self.timingKey = (text, self.background)
+        return self.timingBackground
@@ -1,7 +1,7 @@
 from enum import Enum
 import numpy as np
-import matplotlib.patches as mpatches
-import colorsys
+from matplotlib.collections import EllipseCollection
+from matplotlib.colors import hsv_to_rgb
 
 
 class ChangeType(Enum):
@@ -16,16 +16,36 @@ class PlotType(Enum):
     Dot2 = 2
 
 
+# UnitCircleStuff attributes that depend only on the matrix, as set by updateCircs() and updateOrbit()
+ORBIT_ARRAYS = ['outputDotOffsets', 'outputVectors', 'shadowTips']
+
+
 class CircleColorType(Enum):
     Rainbow = 0
     Shaded = 1
     Flat = 2
 
 
+# Colors for points on unit circle, as a float32 (n, 3) array of RGB. Angles are for the first n points
+# of x, y, which are cos, sin of the angles.
+def circleColors(colorType, angles, x, n, color1, color2):
+    if colorType == CircleColorType.Rainbow:
+        # Hue goes once around color wheel
+        hsv = np.ones((n, 3))
+        hsv[:, 0] = angles[:n] / (2 * np.pi)
+        colors = hsv_to_rgb(hsv)
+    elif colorType == CircleColorType.Shaded:
+        scale = (x[:n, None] + 1) / 2  # Convert [-1,1] range to [0,1]
+        colors = np.asarray(color1) * scale + np.asarray(color2) * (1 - scale)
+    else:
+        colors = np.tile(color1, (n, 1))
+    return colors.astype(np.float32)
+
+
 # Create list of points on unit circle corresponding to steps and dots
 class UnitCircleStuff:
     def __init__(self, _steps, _numdots, circumferenceColor1, circumferenceColor2):
-        self.stepsPerDot = round(_steps / _numdots)
+        self.stepsPerDot = max(round(_steps / _numdots), 1)
         self.numsteps = self.stepsPerDot * _numdots
         self.numdots = _numdots
 
@@ -42,57 +62,86 @@ class UnitCircleStuff:
         self.dotsX = np.cos(dotAngles)
         self.dotsY = np.sin(dotAngles)
 
-        self.dotColorList = []
-        self.stepColorList = []
         self.colorType = CircleColorType.Shaded
 
-        # Create list of red circular patches on unit circle
-        self.patchList1 = []
-        for i in range(0, self.numdots):
-            if self.colorType == CircleColorType.Rainbow:
-                new_color = colorsys.hsv_to_rgb(i/self.numdots,1,1)
-            elif self.colorType == CircleColorType.Shaded:
-                new_color = [0, 0, 0]  # Must use array instead of tuple, as tuple is not mutable
-                for j in range(0, 3):
-                    scale = (self.dotsX[i]+1)/2  # Convert [-1,1] range to [0,1]
-                    new_color[j] = circumferenceColor1[j] * scale + circumferenceColor2[j] * (1 - scale)
-            elif self.colorType == CircleColorType.Flat:
-                new_color = circumferenceColor1
-
-            self.dotColorList.append(new_color)
-            self.patchList1.append(mpatches.Circle((self.dotsX[i], self.dotsY[i]), 0.05, color=new_color))
-
-        for i in range(0, self.numsteps):
-            if self.colorType == CircleColorType.Rainbow:
-                new_color = colorsys.hsv_to_rgb(i/self.numsteps,1,1)
-            elif self.colorType == CircleColorType.Shaded:
-                new_color = [0, 0, 0]  # Must use array instead of tuple, as tuple is not mutable
-                for j in range(0, 3):
-                    scale = (self.unitVectorX[i]+1)/2  # Convert [-1,1] range to [0,1]
-                    new_color[j] = circumferenceColor1[j] * scale + circumferenceColor2[j]  * (1 - scale)
-            elif self.colorType == CircleColorType.Flat:
-                new_color = circumferenceColor1
-
-            self.stepColorList.append(new_color)
-
-
-    # Create NEW list of OUTPUT purple circular patches corresponding to INPUT patches after matrix multiplication
-    def makeCircs(self, Array1, outputColor):
-        self.patchList2 = []
-        for i in range(0, self.numdots):
-            v = [self.dotsX[i], self.dotsY[i]]
-            x2 = np.dot(Array1[0, :], v)
-            y2 = np.dot(Array1[1, :], v)
-            new_color = outputColor
-            if self.colorType != CircleColorType.Flat:
-                new_color = self.dotColorList[i]
-            self.patchList2.append(mpatches.Circle((x2, y2), 0.05, color=new_color))
-
-
-    # Update EXISTING list of output patches with new array
+        # Colors of circular patches on unit circle, and of each step around it
+        self.dotColors = circleColors(self.colorType, dotAngles, self.dotsX, _numdots,
+                                      circumferenceColor1, circumferenceColor2)
+        self.stepColors = circleColors(self.colorType, self.unitVectorAngles, self.unitVectorX, self.numsteps,
+                                       circumferenceColor1, circumferenceColor2)
+
+        self.inputDotOffsets = np.column_stack((self.dotsX[:_numdots], self.dotsY[:_numdots]))
+        self.outputDotOffsets = self.inputDotOffsets.copy()
+        self.dotsShown = 0
+
+    # Create input and output dot collections, one per axis. Output dots are the input dots after matrix
+    # multiplication. Each collection holds every dot, but only draws the first dotsShown of them.
+    def makeCircs(self, Array1, outputColor, ax1, ax2):
+        self.dots1 = self.makeCollection(self.dotColors, ax1)
+
+        self.outputDotColors = self.dotColors
+        if self.colorType == CircleColorType.Flat:
+            self.outputDotColors = np.tile(outputColor, (self.numdots, 1))
+        self.dots2 = self.makeCollection(self.outputDotColors, ax2)
+
+        self.updateCircs(Array1)
+        self.showDots(0)
+
+    # Circles of radius 0.05 in data units, added to axes. Animated, so full canvas draws leave them out
+    def makeCollection(self, colors, ax):
+        dots = EllipseCollection(0.1, 0.1, 0, units='xy', offsets=np.zeros((0, 2)),
+                                 offset_transform=ax.transData, facecolors=colors, linewidths=0, animated=True)
+        ax.add_collection(dots, autolim=False)
+        return dots
+
+    # Update output dots with new array, in one vectorized pass
     def updateCircs(self, Array1):
-        for i in range(0, self.numdots):
-            v = [self.dotsX[i], self.dotsY[i]]
-            x2 = np.dot(Array1[0, :], v)
-            y2 = np.dot(Array1[1, :], v)
-            self.patchList2[i].center = x2, y2
+        self.outputDotOffsets = self.inputDotOffsets @ Array1.T
+        self.dots2.set_offsets(self.outputDotOffsets[:self.dotsShown])
+
+    # Show first n dots, e.g. as animation lays them down during first orbit
+    def showDots(self, n):
+        self.dotsShown = n
+        self.dots1.set_offsets(self.inputDotOffsets[:n])
+        self.dots2.set_offsets(self.outputDotOffsets[:n])
+
+    # Draw just dots start to end of one of the collections, e.g. those laid down since it was last drawn, then
+    # put it back to showing the first dotsShown
+    def drawDots(self, dots, ax, start, end):
+        offsets, colors = ((self.inputDotOffsets, self.dotColors) if dots is self.dots1 else
+                           (self.outputDotOffsets, self.outputDotColors))
+        dots.set_offsets(offsets[start:end])
+        dots.set_facecolor(colors[start:end])
+        ax.draw_artist(dots)
+        dots.set_offsets(offsets[:self.dotsShown])
+        dots.set_facecolor(colors)
+
+    # Compute per-step geometry for a whole orbit in one batched pass. Everything here depends only
+    # on the matrix and the step, so only needs to be redone when matrix changes.
+    def updateOrbit(self, Array1):
+        # Input vectors, one row per step
+        unitVectors = np.column_stack((self.unitVectorX, self.unitVectorY))
+
+        # Output vectors, one row per step
+        self.outputVectors = unitVectors @ Array1.T
+
+        # Normalized matrix rows. A zero-length row gives NaN, which simply doesn't draw
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rowNorms = Array1 / np.linalg.norm(Array1, axis=1, keepdims=True)
+
+        # Projection length of each step's input vector onto each normalized row, shape (rows, steps)
+        rowDots = rowNorms @ unitVectors.T
+
+        # Tip of each shadow/projection, shape (rows, steps, 2 coordinates). Normal runs from input vector to
+        # shadow tip, and shadow from origin to shadow tip, so tips are all each step's lines need
+        self.shadowTips = rowNorms[:, None, :] * rowDots[:, :, None]
+
+    # Everything updateCircs() and updateOrbit() computed for the current matrix, e.g. for caching
+    def orbitArrays(self):
+        return {name: getattr(self, name) for name in ORBIT_ARRAYS}
+
+    # Put back arrays from orbitArrays(), instead of recomputing them for a matrix seen before
+    def restoreOrbit(self, arrays):
+        for name, array in arrays.items():
+            setattr(self, name, array)
+        self.dots2.set_offsets(self.outputDotOffsets[:self.dotsShown])
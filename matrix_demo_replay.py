@@ -0,0 +1,164 @@
+#
+#  Session recording and replay
+#
+#  Records an interactive session to a compact binary log, so that it can be replayed headlessly, e.g. to turn
+#  a slowdown seen live into a reproducible benchmark. Replay is deterministic, because frames are logged too:
+#  settings changes are logged before the frame or animation advance that first sees them, and advances are
+#  logged with the exact elapsed time the scheduler used. Every mouse event is logged as it arrives, for
+#  timing statistics.
+#
+#  Log layout, all little-endian:
+#      header     magic "MDRL", version, steps per orbit, dots per orbit, matrix rows, number of settings,
+#                 then each setting name as length and ASCII bytes
+#      records    kind (1 byte), microseconds since previous record (4 bytes), then payload:
+#                     SETTING  setting index (1 byte), value (float64, NaN for None)
+#                     MOUSE    press/move/release (1 byte), x and y (float64 each, NaN if outside axes)
+#                     FRAME    nothing
+#                     ADVANCE  seconds (float64)
+#                     COMMAND  length (2 bytes), then a line of matrix_demo_control commands, as UTF-8
+#
+
+import math
+import struct
+from time import perf_counter_ns
+
+# My files
+import matrix_demo_graphics as mg
+
+MAGIC = b'MDRL'
+VERSION = 1
+
+# Settings that affect what frames show. Transient flags that only drive GUI bookkeeping are left out
+RECORDED_SETTINGS = ['flagAnimate', 'animation_speed', 'flagChangeMatrix', 'flagCircum', 'flagShadow', 'flagMouseDown',
+                     'flagMouseDownOnset', 'flagX', 'flagY', 'matrixRowsToShow', 'whichRowToAdjust', 'keep_ortho',
+                     'flagShowTiming', 'flagTrail', 'flagInputTrail', 'trailLength', 'flagWarp',
+                     'flagStrip', 'stripOrbits']
+
+SETTING = 0
+MOUSE = 1
+FRAME = 2
+ADVANCE = 3
+COMMAND = 4
+
+MOUSE_KINDS = ['press', 'move', 'release']
+
+HEADER = struct.Struct('<4sBIIHB')
+RECORD = struct.Struct('<BI')
+PAYLOADS = {SETTING: struct.Struct('<Bd'), MOUSE: struct.Struct('<Bdd'), FRAME: struct.Struct(''),
+            ADVANCE: struct.Struct('<d'), COMMAND: struct.Struct('<H')}  # Command text follows its length
+
+
+# Settings values are numbers, booleans, or None
+def encode_value(value):
+    return math.nan if value is None else float(value)
+
+
+def decode_value(value):
+    if math.isnan(value):
+        return None
+    return int(value) if value.is_integer() else value
+
+
+class Recorder:
+
+    def __init__(self, path, stepsPerOrbit, dotsPerOrbit):
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, stepsPerOrbit, dotsPerOrbit, mg.settings.matrixRows,
+                                    len(RECORDED_SETTINGS)))
+        for name in RECORDED_SETTINGS:
+            self.file.write(struct.pack('<B', len(name)) + name.encode('ascii'))
+
+        self.lastTime = perf_counter_ns()
+        self.records = 0
+        self.saved = [object()] * len(RECORDED_SETTINGS)  # Settings as of end of last frame. First frame logs all
+        mg.settings.mouseListeners.append(self.mouse)
+
+    def write(self, kind, *payload, text=b''):
+        now = perf_counter_ns()
+        micros = min((now - self.lastTime) // 1000, 0xFFFFFFFF)
+        self.lastTime = self.lastTime + micros * 1000  # Keep remainder, so rounding doesn't drift
+        self.file.write(RECORD.pack(kind, micros) + PAYLOADS[kind].pack(*payload) + text)
+        self.records = self.records + 1
+
+    # Called with each mouse event, as it arrives
+    def mouse(self, kind, x, y):
+        self.write(MOUSE, MOUSE_KINDS.index(kind), encode_value(x), encode_value(y))
+
+    # Called with each line of commands from the command channel, as it is applied
+    def command(self, line):
+        text = line.encode('utf-8')[:0xFFFF]
+        self.write(COMMAND, len(text), text=text)
+
+    # Log settings changed by the user since they were last logged
+    def write_settings(self):
+        for i, name in enumerate(RECORDED_SETTINGS):
+            value = getattr(mg.settings, name)
+            if value != self.saved[i]:
+                self.write(SETTING, i, encode_value(value))
+                self.saved[i] = value
+
+    # Frame is starting. Log settings changes, then the frame itself
+    def begin_frame(self):
+        self.write_settings()
+        self.write(FRAME)
+
+    # Frame is done. Settings it changed (e.g. clearing flags) are changed by replay too, so don't log them
+    def end_frame(self):
+        self.saved = [getattr(mg.settings, name) for name in RECORDED_SETTINGS]
+
+    # Animation moved forward by this many seconds. Settings changes since the frame (e.g. speed) may have
+    # affected how far, so log them first
+    def advance(self, seconds):
+        self.write_settings()
+        self.write(ADVANCE, seconds)
+
+    def close(self):
+        mg.settings.mouseListeners.remove(self.mouse)
+        self.file.close()
+
+
+# Read a log. Returns header values as a dictionary, and a list of records, each as (seconds since start of
+# recording, kind, payload tuple). Setting records come back as (name, value), mouse records as (kind, x, y),
+# command records as (line,).
+def read_log(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    if len(data) < HEADER.size or data[:len(MAGIC)] != MAGIC:
+        raise ValueError('{:s} is not a matrix demo session log'.format(path))
+    magic, version, steps, dots, matrixRows, numSettings = HEADER.unpack_from(data, 0)
+    if version != VERSION:
+        raise ValueError('{:s} is log version {:d}, but only version {:d} can be read'.format(path, version, VERSION))
+
+    offset = HEADER.size
+    names = []
+    for i in range(numSettings):
+        length = data[offset]
+        names.append(data[offset + 1:offset + 1 + length].decode('ascii'))
+        offset = offset + 1 + length
+
+    records = []
+    micros = 0
+    while offset + RECORD.size <= len(data):
+        kind, delta = RECORD.unpack_from(data, offset)
+        if offset + RECORD.size + PAYLOADS[kind].size > len(data):
+            break  # Last record was cut short, e.g. if the demo crashed
+        payload = PAYLOADS[kind].unpack_from(data, offset + RECORD.size)
+        offset = offset + RECORD.size + PAYLOADS[kind].size
+        micros = micros + delta
+
+        if kind == COMMAND:
+            length = payload[0]
+            if offset + length > len(data):
+                break
+            payload = (data[offset:offset + length].decode('utf-8', 'replace'),)
+            offset = offset + length
+
+        if kind == SETTING:
+            payload = (names[payload[0]], decode_value(payload[1]))
+        elif kind == MOUSE:
+            payload = (MOUSE_KINDS[payload[0]], decode_value(payload[1]), decode_value(payload[2]))
+        records.append((micros / 1e6, kind, payload))
+
+    header = {'steps': steps, 'dots': dots, 'matrix_rows': matrixRows}
+    return header, records
@@ -0,0 +1,187 @@
+#
+#  Event-driven scheduler for the Tk window
+#
+#  Replaces a busy loop that polled Settings flags. GUI callbacks call settings.changed(), which wakes
+#  the input task. Frames are drawn when input asks for one, or at the next frame deadline while
+#  animating, but never faster than the frame rate. When paused, everything sleeps except a light Tk
+#  event pump.
+#
+#  Animation advances by wall-clock time between frames, so it runs at the same speed however fast frames
+#  are drawn. Missed frame deadlines are counted as dropped frames.
+#
+#  Mouse drags are coalesced: however many motion events arrive between frames, the matrix is changed
+#  once per frame, from the latest position. Time from that event to the blit that shows it is recorded
+#  as "input latency".
+#
+#  Commands from the command channel, if open, are applied once per frame, before input.
+#
+#  Optionally, frames, animation advances and the settings and mouse events between them are logged to a
+#  recorder, so the session can be replayed.
+#
+
+import asyncio
+from time import perf_counter_ns
+
+import matplotlib.pyplot as plt
+
+# My files
+import matrix_demo_graphics as mg
+
+# Frames per second while animating
+FRAME_RATE = 60
+# How often to let Tk process GUI events. Tkinter has no portable way to wait on its event
+# source, so we pump it at a rate well above the frame rate, which adds no noticeable latency.
+EVENT_POLL_INTERVAL = 0.005
+
+
+class FrameScheduler:
+
+    def __init__(self, engine, gObjects, frame_rate=FRAME_RATE, recorder=None, commands=None):
+        self.engine = engine
+        self.gObjects = gObjects
+        self.recorder = recorder  # matrix_demo_replay.Recorder, or None
+        self.commands = commands  # matrix_demo_control.CommandQueue, or None
+        self.canvas = engine.canvas
+        self.frame_interval = 1 / frame_rate
+
+        self.redrawAxes = False
+
+        # Mouse drag statistics
+        self.mouseEvents = 0  # Mouse positions received
+        self.mouseFrames = 0  # Frames that changed matrix from a mouse position
+
+        # Created inside the event loop by run()
+        self.wakeEvent = None  # Set when a GUI callback changes a setting
+        self.frameEvent = None  # Set when input needs a new frame drawn
+
+    # Run until user quits
+    def run(self):
+        asyncio.run(self.main())
+
+    # Called by settings.changed() from GUI callbacks
+    def wake(self):
+        if self.wakeEvent is not None:
+            self.wakeEvent.set()
+
+    async def main(self):
+        self.wakeEvent = asyncio.Event()
+        self.frameEvent = asyncio.Event()
+        mg.settings.listeners.append(self.wake)
+
+        tasks = [asyncio.create_task(self.pump_events()),
+                 asyncio.create_task(self.handle_input())]
+        try:
+            await self.draw_frames()
+        finally:
+            for t in tasks:
+                t.cancel()
+            mg.settings.listeners.remove(self.wake)
+
+    # Let Tk process pending GUI events, e.g. button presses and mouse motion. Also notice queued commands,
+    # which arrive on other threads, so can't wake us themselves
+    async def pump_events(self):
+        while True:
+            start = perf_counter_ns()
+            self.canvas.flush_events()
+            self.engine.timer.record('flush_events', perf_counter_ns() - start)
+            if self.commands and self.commands.pending():
+                self.frameEvent.set()
+            await asyncio.sleep(EVENT_POLL_INTERVAL)
+
+    # Respond to button changes, then ask for a new frame. Mouse changes are applied by the frame itself
+    async def handle_input(self):
+        settings = mg.settings
+
+        while not settings.quitflag:
+            await self.wakeEvent.wait()
+            self.wakeEvent.clear()
+
+            if settings.flagRedrawAxes:
+                settings.flagRedrawAxes = False
+                self.redrawAxes = True
+
+            if settings.flagRecalc:
+                # If recalc flag is set, then also update circumference and orthogonal buttons, which commands
+                # may have changed behind their backs
+                if settings.matrixRowsToShow > 1:
+                    self.gObjects.b_circum.state(["!disabled"])
+                    self.gObjects.b_orthogonal.state(["!disabled"])
+                else:
+                    self.gObjects.b_circum.state(["disabled"])
+                    self.gObjects.b_orthogonal.state(["disabled"])
+                self.gObjects.var_ortho.set(settings.keep_ortho)
+
+                # Clear flag so we don't come back
+                settings.flagRecalc = False
+
+            self.frameEvent.set()
+
+    # Draw a frame whenever input asks for one, and at regular deadlines while animating
+    async def draw_frames(self):
+        settings = mg.settings
+        loop = asyncio.get_running_loop()
+        next_frame = loop.time()
+        lastTick = None  # When animation last advanced. None while paused
+
+        while not settings.quitflag:
+            if self.commands:
+                self.commands.apply(self.engine)
+            if self.recorder:
+                self.recorder.begin_frame()
+
+            # Change matrix at most once per frame, from the latest mouse position only
+            eventTime = settings.mouseEventTime
+            self.engine.apply_input()
+            drawn = self.engine.draw_frame()
+
+            if eventTime is not None and drawn:
+                # Frame has been blitted, so latest mouse position is on screen. If it was skipped, the next
+                # frame that is drawn shows it
+                self.engine.timer.record('input latency', perf_counter_ns() - eventTime)
+                self.mouseEvents = self.mouseEvents + settings.mouseEventCount
+                self.mouseFrames = self.mouseFrames + 1
+                settings.mouseEventTime = None
+                settings.mouseEventCount = 0
+
+            if self.recorder:
+                self.recorder.end_frame()
+
+            if self.redrawAxes:
+                plt.pause(0.01)  # Need this to redraw entire plot axis when output panel (lower right) is togged on/off
+                self.redrawAxes = False  # Engine recaptures backgrounds and repaints panels after the full draw
+
+            # Next frame is due one interval after this one. If we fell behind, don't try to catch up.
+            next_frame = max(next_frame + self.frame_interval, loop.time())
+            self.frameEvent.clear()
+            if settings.flagAnimate:
+                # Input arriving meanwhile waits for this frame, so is shown within one frame interval
+                await asyncio.sleep(next_frame - loop.time())
+            else:
+                # Paused. Sleep until something changes, then wait out rest of frame interval, so fast
+                # input (e.g. a high-rate mouse) doesn't draw more frames than the display can show
+                await self.frameEvent.wait()
+                await asyncio.sleep(max(next_frame - loop.time(), 0))
+
+            if settings.flagAnimate and not settings.quitflag:
+                # Advance by time since last advance. First frame after a pause advances by one frame
+                now = loop.time()
+                elapsed = self.frame_interval if lastTick is None else now - lastTick
+                lastTick = now
+
+                dropped = round(elapsed / self.frame_interval) - 1
+                if dropped > 0:
+                    self.engine.droppedFrames = self.engine.droppedFrames + dropped
+                self.engine.advance(elapsed)
+                if self.recorder:
+                    self.recorder.advance(elapsed)
+            else:
+                lastTick = None
+
+    def frame_summary(self):
+        return 'Frames drawn {:d}, dropped {:d}'.format(self.engine.frames, self.engine.droppedFrames)
+
+    def input_summary(self):
+        if self.mouseFrames == 0:
+            return 'No mouse drags'
+        return 'Mouse positions per drag frame {:.2f} ({:d} positions, {:d} frames)'.format(
+            self.mouseEvents / self.mouseFrames, self.mouseEvents, self.mouseFrames)
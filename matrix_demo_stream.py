@@ -0,0 +1,270 @@
+#
+#  Frame streaming to browsers
+#
+#  Serves a small page over HTTP, which opens a WebSocket and paints what it receives onto an HTML canvas. A
+#  new client gets the whole figure as a keyframe. After that, each frame sends only the regions the
+#  compositor blitted, as PNG, so bandwidth and encoding time follow what changed, not the figure size.
+#
+#  Each client has at most one frame in flight: the page acknowledges each message once it has painted it.
+#  Until then, later frames aren't queued for that client. Their regions are merged into what it will be sent
+#  next, from the newest pixels, so slow clients drop stale frames but never miss a change.
+#
+#  Message layout, all little-endian: figure width and height, number of regions (2 bytes each), then for each
+#  region x, y from top left, width, height (2 bytes each) and PNG length (4 bytes), then the PNG files.
+#
+
+import base64
+import hashlib
+import http.server
+import io
+import socket
+import struct
+import threading
+
+import matplotlib.image as mimage
+import numpy as np
+
+# My files
+import matrix_demo_compositor as mc
+
+# PNG is lossless at any level. Fastest compression keeps encoding time low
+PNG_COMPRESS_LEVEL = 1
+
+# Appended to client's key, to prove to browser that we speak WebSocket (RFC 6455)
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+PAGE = b'''<!DOCTYPE html>
+<html><head><title>Matrix demo</title></head>
+<body style="margin:0; background:#fff">
+<canvas id="figure"></canvas>
+<script>
+const canvas = document.getElementById('figure');
+const context = canvas.getContext('2d');
+const socket = new WebSocket('ws://' + location.host + '/ws');
+socket.binaryType = 'arraybuffer';
+
+// Paint messages strictly in order, however long each takes to decode. Let server know each one was painted,
+// so it can send the next
+let painted = Promise.resolve();
+socket.onmessage = (event) => { painted = painted.then(() => paint(event.data)).then(() => socket.send('a')); };
+
+async function paint(data) {
+    const view = new DataView(data);
+    const width = view.getUint16(0, true), height = view.getUint16(2, true), count = view.getUint16(4, true);
+    if (canvas.width !== width || canvas.height !== height) {
+        canvas.width = width;
+        canvas.height = height;
+    }
+    let offset = 6 + 12 * count;
+    const regions = [];
+    for (let i = 0; i < count; i++) {
+        const h = 6 + 12 * i, length = view.getUint32(h + 8, true);
+        const png = new Blob([new Uint8Array(data, offset, length)], {type: 'image/png'});
+        regions.push(createImageBitmap(png).then((bitmap) => [view.getUint16(h, true), view.getUint16(h + 2, true), bitmap]));
+        offset += length;
+    }
+    for (const [x, y, bitmap] of await Promise.all(regions)) {
+        context.drawImage(bitmap, x, y);
+    }
+}
+</script>
+</body></html>
+'''
+
+
+# Frame a binary WebSocket message. Server messages are not masked
+def websocket_frame(payload):
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('<BB', 0x82, length)
+    elif length < 1 << 16:
+        header = struct.pack('>BBH', 0x82, 126, length)
+    else:
+        header = struct.pack('>BBQ', 0x82, 127, length)
+    return header + payload
+
+
+# Read one message from a client, and return its opcode, or None if connection closed. Client messages are
+# masked, and small, as they are only acknowledgements
+def websocket_read(connection):
+    def read(n):
+        data = b''
+        while len(data) < n:
+            chunk = connection.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError
+            data = data + chunk
+        return data
+
+    try:
+        first, second = read(2)
+        length = second & 0x7F
+        if length == 126:
+            length, = struct.unpack('>H', read(2))
+        elif length == 127:
+            length, = struct.unpack('>Q', read(8))
+        read(4 + length)  # Mask and payload. Contents don't matter
+    except ConnectionError:
+        return None
+    opcode = first & 0x0F
+    return None if opcode == 0x8 else opcode  # 0x8 is close
+
+
+def encode_png(pixels):
+    buffer = io.BytesIO()
+    mimage.imsave(buffer, pixels, format='png', pil_kwargs={'compress_level': PNG_COMPRESS_LEVEL})
+    return buffer.getvalue()
+
+
+class StreamClient:
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.condition = threading.Condition()
+        self.busy = False  # Sending a frame, or waiting for client to paint it
+        self.job = None  # Regions to send next, as (x, y, pixels)
+        self.pending = []  # Bboxes changed since last frame sent
+        self.keyframe = True  # Send whole figure next
+
+        self.framesSent = 0
+        self.framesDropped = 0
+        self.bytesSent = 0
+
+
+class FrameStreamer:
+
+    def __init__(self, engine):
+        self.canvas = engine.canvas
+        self.compositor = engine.compositor
+        self.clients = []
+        self.lock = threading.Lock()
+        self.totals = [0, 0, 0]  # Frames sent, frames dropped, bytes sent, by clients that have left
+
+        # Full draws repaint things no panel covers, e.g. titles, so every client needs a keyframe
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+
+    def on_draw(self, _event=None):
+        with self.lock:
+            for client in self.clients:
+                client.keyframe = True
+
+    # Frame was blitted. Hand its regions to every client that is free, and note them for the rest. Only call
+    # for frames draw_frame() actually drew, or regions of the frame before are sent again
+    def frame_done(self):
+        with self.lock:
+            clients = list(self.clients)
+        if not clients:
+            return
+
+        regions = [bbox.frozen() for bbox in self.compositor.regionsLastFrame]
+        buffer = np.asarray(self.canvas.buffer_rgba())
+        height, width = buffer.shape[:2]
+
+        for client in clients:
+            with client.condition:
+                if client.keyframe:
+                    client.pending = [self.canvas.figure.bbox.frozen()]
+                    client.keyframe = False
+                else:
+                    client.pending.extend(regions)
+                if client.busy:
+                    if regions:
+                        client.framesDropped = client.framesDropped + 1
+                    continue
+                if not client.pending:
+                    continue
+
+                # Copy pixels now, while they are this frame's. Encoding happens on the client's thread
+                job = []
+                for bbox in mc.merge_bboxes(client.pending):
+                    x0 = max(int(np.floor(bbox.x0)), 0)
+                    x1 = min(int(np.ceil(bbox.x1)), width)
+                    top = max(int(np.floor(height - bbox.y1)), 0)
+                    bottom = min(int(np.ceil(height - bbox.y0)), height)
+                    if x1 > x0 and bottom > top:
+                        job.append((x0, top, buffer[top:bottom, x0:x1, :3].copy()))
+                client.pending = []
+                client.job = (width, height, job)
+                client.busy = True
+                client.condition.notify()
+
+    # Send frames to a client until it goes away. Runs on the client's own thread
+    def stream_to(self, connection):
+        client = StreamClient(connection)
+        with self.lock:
+            self.clients.append(client)
+
+        try:
+            while True:
+                with client.condition:
+                    client.condition.wait_for(lambda: client.job is not None)
+                    width, height, job = client.job
+                    client.job = None
+
+                pngs = [encode_png(pixels) for x, y, pixels in job]
+                message = struct.pack('<HHH', width, height, len(job))
+                for (x, y, pixels), png in zip(job, pngs):
+                    message = message + struct.pack('<HHHHI', x, y, pixels.shape[1], pixels.shape[0], len(png))
+                message = websocket_frame(message + b''.join(pngs))
+                connection.sendall(message)
+                if websocket_read(connection) is None:
+                    break  # Closed rather than acknowledged
+
+                with client.condition:
+                    client.busy = False
+                    client.framesSent = client.framesSent + 1
+                    client.bytesSent = client.bytesSent + len(message)
+        except OSError:
+            pass  # Client went away
+        finally:
+            with self.lock:
+                self.clients.remove(client)
+                self.totals = [self.totals[0] + client.framesSent, self.totals[1] + client.framesDropped,
+                               self.totals[2] + client.bytesSent]
+
+    def summary(self):
+        with self.lock:
+            sent, dropped, sentBytes = self.totals
+            for client in self.clients:
+                sent, dropped, sentBytes = (sent + client.framesSent, dropped + client.framesDropped,
+                                            sentBytes + client.bytesSent)
+        if sent == 0:
+            return 'No frames streamed'
+        return 'Frames streamed {:d}, dropped {:d}, {:.1f} kB per frame'.format(sent, dropped, sentBytes / sent / 1e3)
+
+
+class StreamHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # WebSocket upgrade needs it
+
+    def do_GET(self):
+        if self.path == '/ws' and self.headers.get('Upgrade', '').lower() == 'websocket':
+            key = self.headers.get('Sec-WebSocket-Key', '')
+            accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+            self.send_response(101, 'Switching Protocols')
+            self.send_header('Upgrade', 'websocket')
+            self.send_header('Connection', 'Upgrade')
+            self.send_header('Sec-WebSocket-Accept', accept)
+            self.end_headers()
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.server.streamer.stream_to(self.connection)
+            self.close_connection = True
+        elif self.path == '/':
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(PAGE)))
+            self.end_headers()
+            self.wfile.write(PAGE)
+        else:
+            self.send_error(404)
+
+    def log_message(self, *args):
+        pass  # Don't log every request
+
+
+# Serve page and stream on host:port, in background threads
+def start_server(host, port, streamer):
+    server = http.server.ThreadingHTTPServer((host, port), StreamHandler)
+    server.daemon_threads = True
+    server.streamer = streamer
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
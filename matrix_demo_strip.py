@@ -0,0 +1,140 @@
+#
+#  Scrolling strip chart of dot products
+#
+#  Shows each row's dot product over the last few orbits, newest on the right, in place of the bar chart.
+#  One sample per animation step is kept in a preallocated ring buffer. Rather than plot every sample every
+#  frame, the chart is kept as a layer over the panel background. Each frame scrolls it left by however many
+#  whole pixels the newest sample moved, then redraws just the columns that scrolled in, plus a few for line
+#  width. Cost per frame doesn't depend on history length. The ring buffer is only replayed in full after a
+#  full canvas draw, or when rows shown change.
+#
+#  Sample i sits at x = end + i * pixelsPerStep - round(newest * pixelsPerStep), so scrolling by the change in
+#  round(newest * pixelsPerStep) puts old pixels exactly where a full redraw would. Everything inside the axes
+#  frame scrolls, so the background there should be plain, as it is unless other labels overlap the panel.
+#
+
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.transforms import Bbox, IdentityTransform, blended_transform_factory
+
+STRIP_WIDTH = 1.5
+
+# Pixels inside the axes frame that are left alone, so the frame itself never scrolls
+MARGIN = 2
+
+
+class StripChart:
+
+    def __init__(self, ax, colors, numRows, length):
+        self.ax = ax
+        self.canvas = ax.figure.canvas
+        self.numRows = numRows
+
+        # One polyline per row. x is in display pixels, y in data
+        self.lines = ax.add_collection(LineCollection([], colors=colors, linewidths=STRIP_WIDTH, animated=True,
+                                                      transform=blended_transform_factory(IdentityTransform(),
+                                                                                          ax.transData)),
+                                       autolim=False)
+
+        self.samples = np.zeros((0, numRows))
+        self.set_length(length)
+
+    # Keep dot products of the last length steps
+    def set_length(self, length):
+        self.samples = np.zeros((length, self.numRows))  # Ring buffer. Step s is at s % length
+        self.clear()
+
+    # Forget all samples
+    def clear(self):
+        self.first = None  # Oldest step sampled
+        self.newest = None  # Newest step sampled
+        self.drawnStep = None  # Newest step drawn onto layer
+        self.key = None  # Base, rows and frame that layer was drawn for
+        self.basePixels = None  # Inside of base's frame, for blanking columns
+        self.layer = None  # Base with strip chart on it, as saved by copy_from_bbox
+
+    # Forget layer, e.g. after a full canvas draw, and replay samples next time
+    def invalidate(self):
+        self.layer = None
+
+    # Sample every step since the last one, up to step, counting from start of animation. Dot products come
+    # from the orbit's precomputed output vectors, one per step of a single orbit, so step s of any orbit is
+    # row s % len(outputVectors). Going backwards (e.g. a seek) starts history afresh.
+    def add_step(self, step, outputVectors):
+        length = len(self.samples)
+        if self.newest is None or step < self.newest:
+            self.clear()
+            self.first = step
+            start = step
+        elif step == self.newest:
+            return
+        else:
+            start = max(self.newest + 1, step - length + 1)
+        steps = np.arange(start, step + 1)
+        self.samples[steps % length] = outputVectors[steps % len(outputVectors)]
+        self.newest = step
+
+    # Polylines of samples from step start to newest, for the first rows. Newest is at x = end
+    def segments(self, start, rows, end, pixelsPerStep):
+        steps = np.arange(max(start, self.first, self.newest - len(self.samples) + 1), self.newest + 1)
+        x = end + steps * pixelsPerStep - round(self.newest * pixelsPerStep)
+        values = self.samples[steps % len(self.samples)]
+        return [np.column_stack((x, values[:, r])) for r in range(rows)]
+
+    # Draw samples from step start onwards, clipped to box
+    def draw(self, start, rows, end, pixelsPerStep, box):
+        self.lines.set_segments(self.segments(start, rows, end, pixelsPerStep))
+        self.lines.set_clip_box(box)
+        self.ax.draw_artist(self.lines)
+
+    # Bring layer up to date on top of base, a background saved by copy_from_bbox. Afterwards, layer holds base
+    # with strip chart drawn on it. Does nothing unless a step was added, or base or rows shown changed.
+    def render(self, base, rows):
+        if self.newest is None:
+            return
+
+        # Inside of axes frame, in pixels from top left of canvas
+        height = self.canvas.figure.bbox.height
+        bbox = self.ax.bbox
+        left = int(np.ceil(bbox.x0)) + MARGIN
+        right = int(bbox.x1) - MARGIN
+        top = int(np.ceil(height - bbox.y1)) + MARGIN
+        bottom = int(height - bbox.y0) - MARGIN
+        width = right - left
+        key = (base, rows, left, right, top, bottom)
+
+        # Newest sample is a line width in from the right, so it shows in full. Lines reach about a line width
+        # either side of samples, so scrolling in a column means redrawing up to two line widths before it too
+        lineWidth = int(np.ceil(STRIP_WIDTH * self.canvas.figure.dpi / 72))
+        end = right - lineWidth
+        pad = 2 * lineWidth + 2
+        pixelsPerStep = (end - left) / len(self.samples)
+
+        if self.layer is not None and key == self.key and self.newest == self.drawnStep:
+            return
+
+        pixels = np.asarray(self.canvas.buffer_rgba())  # Writable view of canvas
+        fresh = self.layer is None or key != self.key
+        scroll = 0 if fresh else round(self.newest * pixelsPerStep) - round(self.drawnStep * pixelsPerStep)
+        if fresh or scroll + pad >= width:
+            # Replay every sample
+            self.canvas.restore_region(base)
+            self.basePixels = pixels[top:bottom, left:right].copy()
+            self.draw(self.first, rows, end, pixelsPerStep,
+                      Bbox.from_extents(left, height - bottom, right, height - top))
+        else:
+            # Scroll old pixels left, blank the columns that scrolled in or that new lines reach into, and draw
+            # just those columns
+            self.canvas.restore_region(self.layer)
+            inside = pixels[top:bottom, left:right]
+            if scroll:
+                inside[:, :-scroll] = inside[:, scroll:]
+            redraw = scroll + pad
+            inside[:, -redraw:] = self.basePixels[:, -redraw:]
+            start = self.newest - int(np.ceil((redraw + lineWidth) / pixelsPerStep)) - 1
+            self.draw(start, rows, end, pixelsPerStep,
+                      Bbox.from_extents(right - redraw, height - bottom, right, height - top))
+
+        self.key = key
+        self.drawnStep = self.newest
+        self.layer = self.canvas.copy_from_bbox(self.ax.bbox)
@@ -0,0 +1,183 @@
+#
+#  Per-stage frame timing
+#
+#  Each stage of a frame is timed with perf_counter_ns() and counted in a log-scale histogram, so
+#  recording costs a couple of integer operations and memory stays fixed however long we run.
+#  Buckets are 1/8 of an octave wide, so percentiles are accurate to about 12%.
+#
+
+import csv
+import json
+import platform
+from time import perf_counter_ns
+
+import matplotlib
+
+# My files
+import matrix_demo_graphics as mg
+
+# Stages of a frame, in the order they run
+STAGES = ['math', 'dots', 'trail', 'text update', 'text redraw', 'bar chart', 'ax1 draw', 'ax2 draw', 'blit',
+          'flush_events', 'input latency']
+
+SUB_BITS = 3  # 2^3 = 8 buckets per octave
+NUM_BUCKETS = 64 << SUB_BITS  # Enough for anything up to 2^63 ns
+
+
+# Histogram bucket for a time in ns. Below 16 ns buckets are 1 ns wide, then 8 per octave.
+def bucket_index(ns):
+    if ns < (2 << SUB_BITS):
+        return max(ns, 0)
+    shift = ns.bit_length() - SUB_BITS - 1
+    return (shift << SUB_BITS) + (ns >> shift)
+
+
+# Lowest time in ns that falls in a bucket
+def bucket_low(index):
+    if index < (2 << SUB_BITS):
+        return index
+    shift = (index >> SUB_BITS) - 1
+    return ((index & ((1 << SUB_BITS) - 1)) + (1 << SUB_BITS)) << shift
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * NUM_BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, ns):
+        self.counts[bucket_index(ns)] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    # Approximate percentile in ns, as the middle of the bucket it falls in
+    def percentile(self, p):
+        if self.count == 0:
+            return 0
+        target = p / 100 * self.count
+        seen = 0
+        for i in range(0, NUM_BUCKETS):
+            seen += self.counts[i]
+            if seen >= target and self.counts[i] > 0:
+                return min((bucket_low(i) + bucket_low(i + 1)) // 2, self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+
+class StageTimer:
+
+    def __init__(self, stages=STAGES):
+        self.histograms = {s: Histogram() for s in stages}
+        self.last = perf_counter_ns()
+
+    # Start of frame. Next mark() times from here
+    def begin(self):
+        self.last = perf_counter_ns()
+
+    # Record time since previous mark (or begin) against stage
+    def mark(self, stage):
+        now = perf_counter_ns()
+        self.histograms[stage].add(now - self.last)
+        self.last = now
+
+    # Record a time measured elsewhere
+    def record(self, stage, ns):
+        self.histograms[stage].add(ns)
+
+    # One line per stage with p50/p95/p99 in ms, for showing on screen
+    def summary_lines(self):
+        lines = ['{:<13s}{:>7s}{:>7s}{:>7s}'.format('stage (ms)', 'p50', 'p95', 'p99')]
+        for stage, h in self.histograms.items():
+            if h.count:
+                lines.append('{:<13s}{:7.2f}{:7.2f}{:7.2f}'.format(
+                    stage, h.percentile(50) / 1e6, h.percentile(95) / 1e6, h.percentile(99) / 1e6))
+        return lines
+
+    def to_dict(self, metadata=None):
+        stages = {}
+        for stage, h in self.histograms.items():
+            stages[stage] = {
+                'count': h.count,
+                'mean_ns': h.mean(),
+                'p50_ns': h.percentile(50),
+                'p95_ns': h.percentile(95),
+                'p99_ns': h.percentile(99),
+                'max_ns': h.max,
+                # Non-empty buckets, as [lowest ns, count]
+                'buckets': [[bucket_low(i), c] for i, c in enumerate(h.counts) if c],
+            }
+        return {'metadata': metadata or {}, 'stages': stages}
+
+    # Write summary and histograms to <prefix>.json, and histogram buckets to <prefix>.csv
+    def dump(self, prefix, metadata=None):
+        with open(prefix + '.json', 'w') as f:
+            json.dump(self.to_dict(metadata), f, indent=2)
+
+        with open(prefix + '.csv', 'w', newline='') as f:
+            w = csv.writer(f)
+            w.writerow(['stage', 'low_ns', 'high_ns', 'count'])
+            for stage, h in self.histograms.items():
+                for i, c in enumerate(h.counts):
+                    if c:
+                        w.writerow([stage, bucket_low(i), bucket_low(i + 1), c])
+
+
+# Wall-clock time of each startup phase, for --startup-profile
+class StartupProfile:
+
+    def __init__(self, start_ns, enabled=True):
+        self.enabled = enabled  # Whether caller should print it
+        self.start = start_ns
+        self.last = start_ns
+        self.phases = []  # [phase, ns]
+
+    # Record time since previous mark (or start) against phase
+    def mark(self, phase):
+        now = perf_counter_ns()
+        self.phases.append([phase, now - self.last])
+        self.last = now
+
+    # Call func, and record how long it took, without moving the marks. For work overlapped in another thread.
+    def time_call(self, phase, func, *args):
+        start = perf_counter_ns()
+        result = func(*args)
+        self.phases.append([phase, perf_counter_ns() - start])
+        return result
+
+    def summary_lines(self):
+        lines = ['{:<32s}{:>8.1f} ms'.format(phase, ns / 1e6) for phase, ns in self.phases]
+        lines.append('{:<32s}{:>8.1f} ms'.format('total', (self.last - self.start) / 1e6))
+        return lines
+
+
+# Describe a run, so timings from different machines and settings can be compared
+def run_metadata(engine, mode):
+    return {
+        'mode': mode,
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'matplotlib': matplotlib.__version__,
+        'backend': matplotlib.get_backend(),
+        'steps_per_orbit': engine.u.numsteps,
+        'dots_per_orbit': engine.u.numdots,
+        'figure_pixels': [int(v) for v in engine.canvas.figure.bbox.size],
+        'dpi': engine.canvas.figure.dpi,
+        'matrix_rows': mg.settings.matrixRows,
+        'rows': mg.settings.matrixRowsToShow,
+        'circumference': bool(mg.settings.flagCircum),
+        'shadow': bool(mg.settings.flagShadow),
+        'trail': mg.settings.trailLength if mg.settings.flagTrail else 0,
+        'input_trail': bool(mg.settings.flagTrail and mg.settings.flagInputTrail),
+        'strip': mg.settings.stripOrbits if mg.settings.flagStrip else 0,
+        'warp': bool(mg.settings.flagWarp),
+        'frames': engine.frames,
+        'dropped_frames': engine.droppedFrames,
+        'orbit_cache_hits': engine.orbitCache.hits,
+        'orbit_cache_misses': engine.orbitCache.misses,
+    }
@@ -0,0 +1,139 @@
+#
+#  Fading trail behind a vector tip
+#
+#  Last K tip positions are kept in a fixed-size ring buffer. Rather than draw K segments every frame, the trail
+#  is kept as an accumulation layer: the difference between the panel with trail and without it. Each new
+#  position fades the layer a little and draws one new segment onto it, so cost per frame doesn't depend on K.
+#  Fade is set so a segment has faded out completely after K more positions. The ring buffer is only used to
+#  rebuild the layer after a full canvas draw, when every panel's pixels may have moved, by replaying it
+#  through the same fade-and-add steps.
+#
+
+import numpy as np
+from matplotlib.lines import Line2D
+
+TRAIL_WIDTH = 2
+
+
+class Trail:
+
+    def __init__(self, ax, color, length):
+        self.ax = ax
+        self.canvas = ax.figure.canvas
+        self.color = color
+
+        self.points = np.zeros((0, 2))
+        self.count = 0
+        self.head = 0
+        self.set_length(length)
+
+        # Newest segment. Drawn by us onto accumulation layer only
+        self.segment = ax.add_line(Line2D([0, 0], [0, 0], color=color, linewidth=TRAIL_WIDTH,
+                                          solid_capstyle='round', animated=True))
+
+        self.delta = None  # Panel with trail minus panel without, as float32 RGB. None if it must be rebuilt
+        self.base = None  # Background that layer was composed on
+        self.basePixels = None  # Base as float32 RGB, for composing
+        self.scratch = None
+        self.layer = None  # Background with trail on it, as saved by copy_from_bbox
+
+    # Keep last length positions. Fades so that a position disappears once length newer ones have been added
+    def set_length(self, length):
+        self.points = np.zeros((length, 2))  # Ring buffer of tip positions. Oldest is overwritten first
+        self.fade = (1 / 255) ** (1 / length)
+        self.clear()
+
+    # Forget all positions
+    def clear(self):
+        self.count = 0
+        self.head = 0  # Index where next position goes
+        self.newSegment = None  # Segment added since layer was last brought up to date, if any
+        self.delta = None
+
+    # Forget accumulation layer, e.g. after a full canvas draw, and rebuild it from positions next time
+    def invalidate(self):
+        self.delta = None
+
+    # Positions, oldest first
+    def ordered_points(self):
+        if self.count < len(self.points):
+            return self.points[:self.count]
+        return np.roll(self.points, -self.head, axis=0)
+
+    # Add a tip position, if it moved. Shows up once layer is brought up to date by render()
+    def add(self, x, y):
+        if self.count:
+            previous = self.points[self.head - 1]
+            if previous[0] == x and previous[1] == y:
+                return
+            self.newSegment = ([previous[0], x], [previous[1], y])
+        self.points[self.head] = (x, y)
+        self.head = (self.head + 1) % len(self.points)
+        self.count = min(self.count + 1, len(self.points))
+
+    # Write base plus trail, rounded, to pixels, a view of the panel in the canvas. Trail is kept in floats, so
+    # that slow fades aren't lost to rounding. Base plus trail stays within 0-255, so adding 0.5 and truncating
+    # rounds it.
+    def compose(self, pixels):
+        np.add(self.basePixels, self.delta, out=self.scratch)
+        self.scratch += 0.5
+        pixels[:] = self.scratch
+
+    # Draw segment on top of base plus trail divided by scale, and add what it changed to trail, also divided
+    # by scale. Only pixels near it can change, so only those are composed first. x1, y1 are the panel's
+    # top left corner in the canvas, and pixels is a view of the panel.
+    def add_segment(self, segment, pixels, scale, x1, y1):
+        self.segment.set_data(*segment)
+        box = self.segment.get_window_extent().padded(TRAIL_WIDTH + 1)
+        height = self.canvas.figure.bbox.height
+        left = max(int(box.x0) - x1, 0)
+        right = max(int(np.ceil(box.x1)) - x1, 0)
+        top = max(int(height - box.y1) - y1, 0)
+        bottom = max(int(np.ceil(height - box.y0)) - y1, 0)
+        near = (slice(top, bottom), slice(left, right))
+
+        scratch = self.scratch[near]
+        np.multiply(self.delta[near], scale, out=scratch)
+        scratch += self.basePixels[near]
+        scratch += 0.5
+        pixels[near] = scratch
+        self.ax.draw_artist(self.segment)
+        self.delta[near] += (pixels[near] - np.floor(scratch)) / scale
+
+    # Bring accumulation layer up to date on top of base, a background saved by copy_from_bbox. Afterwards,
+    # layer holds base with trail drawn on it. Does nothing unless tip moved, or base changed (e.g. dots were
+    # baked in) since last time.
+    def render(self, base):
+        if self.newSegment is None and self.delta is not None and base is self.base:
+            return
+
+        self.canvas.restore_region(base)
+        x1, y1, x2, y2 = base.get_extents()
+        pixels = np.asarray(self.canvas.buffer_rgba())[y1:y2, x1:x2, :3]  # Writable view of panel in canvas
+        if base is not self.base or self.basePixels.shape != pixels.shape:
+            self.base = base
+            self.basePixels = pixels.astype(np.float32)
+            self.scratch = np.empty_like(self.basePixels)
+
+        if self.delta is None or self.delta.shape != pixels.shape:
+            # Replay positions through the same fade-and-add steps as below, so that a rebuilt trail looks just
+            # like one built up frame by frame. Rather than fade the whole layer for every segment, trail is
+            # kept divided by scale, the fade so far, and only multiplied out at the end.
+            self.delta = np.zeros_like(self.basePixels)
+            points = self.ordered_points()
+            scale = 1.0
+            for start, end in zip(points[:-1], points[1:]):
+                scale = scale * self.fade
+                self.add_segment(([start[0], end[0]], [start[1], end[1]]), pixels, scale, x1, y1)
+            self.delta *= scale
+            self.compose(pixels)
+        else:
+            # Fade existing trail towards base, write base plus trail to canvas, and add newest segment
+            if self.newSegment:
+                self.delta *= self.fade
+            self.compose(pixels)
+            if self.newSegment:
+                self.add_segment(self.newSegment, pixels, 1.0, x1, y1)
+
+        self.newSegment = None
+        self.layer = self.canvas.copy_from_bbox(self.ax.bbox)
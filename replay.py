@@ -0,0 +1,91 @@
+#
+#  Session replay
+#
+#  Replays a session recorded with main.py --record, offscreen, and reports frame timings. Every frame is drawn
+#  with the same settings, matrix and animation position as when it was recorded, so a slowdown seen live
+#  becomes a benchmark that can be rerun on any machine. Runs as fast as possible, or at recorded pace.
+#
+#  Example:
+#      python main.py --record session.mdrl
+#      python replay.py session.mdrl --timing replay
+#
+
+import argparse
+import time
+from time import perf_counter_ns
+
+# My files
+import matrix_demo_control as mc
+import matrix_demo_graphics as mg
+import matrix_demo_engine as me
+import matrix_demo_replay as mr
+import matrix_demo_timing as mt
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a recorded matrix demo session offscreen, and time its frames')
+    parser.add_argument('log', help='session log written by main.py --record')
+    parser.add_argument('--realtime', action='store_true',
+                        help='replay at recorded pace, rather than as fast as possible')
+    parser.add_argument('--size', type=int, default=1000, help='figure size in pixels')
+    parser.add_argument('--dpi', type=int, default=100, help='figure DPI')
+    parser.add_argument('--timing', metavar='PREFIX',
+                        help='write per-stage frame timing histograms to PREFIX.json and PREFIX.csv')
+    args = parser.parse_args()
+
+    try:
+        header, records = mr.read_log(args.log)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    settings = mg.settings
+    settings.matrixRows = header['matrix_rows']
+
+    gObjects = mg.HeadlessGraphicsObjects(args.size, args.dpi)
+    engine = me.AnimationEngine(gObjects.canvas1, gObjects.textObj, header['steps'], header['dots'])
+
+    commands = mc.CommandQueue()
+    frameTimes = mt.Histogram()
+    mouseEvents = 0
+    start = perf_counter_ns()
+    for seconds, kind, payload in records:
+        if args.realtime:
+            time.sleep(max(start / 1e9 + seconds - perf_counter_ns() / 1e9, 0))
+
+        if kind == mr.SETTING:
+            setattr(settings, *payload)
+        elif kind == mr.MOUSE:
+            # Only counted. Mouse position reaches frames through settings, as it did when recorded
+            mouseEvents = mouseEvents + 1
+            if settings.mouseEventTime is None:
+                settings.mouseEventTime = perf_counter_ns()
+        elif kind == mr.FRAME:
+            t = perf_counter_ns()
+            engine.apply_input()
+            drawn = engine.draw_frame()
+            frameTimes.add(perf_counter_ns() - t)
+            if settings.mouseEventTime is not None and drawn:
+                engine.timer.record('input latency', perf_counter_ns() - settings.mouseEventTime)
+                settings.mouseEventTime = None
+        elif kind == mr.ADVANCE:
+            engine.advance(*payload)
+        elif kind == mr.COMMAND:
+            # Applied as they were, just before the next frame
+            commands.put_line(*payload)
+            commands.apply(engine)
+    elapsed = (perf_counter_ns() - start) / 1e9
+
+    recorded = records[-1][0] if records else 0
+    print('Replayed {:d} frames, {:d} mouse events, in {:.2f} s ({:.2f} s recorded, {:.1f} frames/sec)'.format(
+        engine.frames, mouseEvents, elapsed, recorded, engine.frames / elapsed))
+    print('Frame ms: mean {:.2f} p50 {:.2f} p95 {:.2f} p99 {:.2f} max {:.2f}'.format(
+        frameTimes.mean() / 1e6, frameTimes.percentile(50) / 1e6, frameTimes.percentile(95) / 1e6,
+        frameTimes.percentile(99) / 1e6, frameTimes.max / 1e6))
+    print(engine.compositor.summary())
+    print(engine.orbitCache.summary())
+    print('\n'.join(engine.timer.summary_lines()))
+    if args.timing:
+        engine.timer.dump(args.timing, mt.run_metadata(engine, 'replay'))
+
+
+if __name__ == '__main__':
+    main()